@@ -0,0 +1,333 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from config_loader import load_config
+from excel_export import export_to_excel
+from gantt import export_gantt_chart
+from park_loader import load_parks_from_csv
+from scheduler import MowingScheduler
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+# Pipeline stages in run order; running one runs every stage before it
+STAGES = ("load_csv", "assign_parks", "export_jobs", "build_calendar", "generate_metrics", "excel", "gantt")
+AREA_DISTRIBUTIONS = ("lognormal", "uniform")
+# Slowdown over the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+def synthetic_jobs(rows, teams=40, parks=5000, weeks=52, seed=0):
+    """Job table (``add_week_and_weekday`` format) with ``rows`` random jobs."""
+    rng = np.random.default_rng(seed)
+    day = rng.integers(1, weeks * len(WEEKDAYS) + 1, rows)
+    park = rng.integers(0, parks, rows)
+    hours = np.round(rng.random(rows) * 8, 2)
+    return pd.DataFrame({
+        "Team": np.array([f"Team {i}" for i in range(teams)], dtype=object)[rng.integers(0, teams, rows)],
+        "Day": day,
+        "Park": np.array([f"Park {i}" for i in range(parks)], dtype=object)[park],
+        "Area (sqm)": np.round(hours * 1500, 2),
+        "Estimated Hours": hours,
+        "Overtime": rng.random(rows) < 0.2,
+        "Week": (day - 1) // len(WEEKDAYS) + 1,
+        "Weekday": np.array(WEEKDAYS, dtype=object)[(day - 1) % len(WEEKDAYS)],
+    })
+
+
+def synthetic_parks(n, suburbs=40, area="lognormal", priorities=3, dependency_density=0.0, located=False, seed=0):
+    """
+    ``n`` random parks as a DataFrame in CSV layout, and their dependencies.
+
+    Areas are lognormal (median 5,000 sqm, a long tail of large parks) or
+    uniform between 500 and 20,000 sqm. Higher priorities are rarer. A
+    ``dependency_density`` share of parks depends on one to three earlier
+    parks, so the graph has no cycles. With ``located``, parks are
+    scattered a few km around a centre per suburb.
+
+    Returns:
+        tuple: (parks DataFrame, DEPENDENCIES dict)
+    """
+    if area not in AREA_DISTRIBUTIONS:
+        raise ValueError(f"Unknown area distribution {area!r}; expected one of {AREA_DISTRIBUTIONS}")
+    rng = np.random.default_rng(seed)
+    suburb = rng.integers(0, suburbs, n)
+    if area == "lognormal":
+        areas = np.clip(rng.lognormal(np.log(5000), 0.8, n), 200, 200_000)
+    else:
+        areas = rng.uniform(500, 20_000, n)
+    weights = 0.5 ** np.arange(priorities)
+    parks = pd.DataFrame({
+        "name": [f"Park {i}" for i in range(n)],
+        "suburb": np.array([f"Suburb {k}" for k in range(suburbs)], dtype=object)[suburb],
+        "area_sqm": areas.round(1),
+        "priority": rng.choice(priorities, n, p=weights / weights.sum()),
+    })
+    if located:
+        centres = np.column_stack([rng.uniform(-27.8, -27.4, suburbs), rng.uniform(152.6, 153.1, suburbs)])
+        parks["lat"] = (centres[suburb, 0] + rng.normal(0, 0.01, n)).round(6)
+        parks["lon"] = (centres[suburb, 1] + rng.normal(0, 0.01, n)).round(6)
+
+    dependencies = {}
+    for i in np.flatnonzero(rng.random(n) < dependency_density).tolist():
+        if i > 0:
+            prerequisites = rng.integers(0, i, rng.integers(1, 4))
+            dependencies[f"Park {i}"] = sorted({f"Park {j}" for j in prerequisites.tolist()})
+    return parks, dependencies
+
+
+def synthetic_fleet(teams=48, groups=6, suburbs=40, seed=0):
+    """
+    TEAM_NAME_MAPPING, SUBURB_TO_COMBINED_TEAM and WEEKLY_HOUR_LIMITS for
+    ``teams`` teams split over ``groups`` groups. Each suburb may use one
+    group, or two for about a third of suburbs.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"Group {g}" for g in range(groups)]
+    mapping = {name: [] for name in names}
+    for t in range(teams):
+        mapping[names[t % groups]].append(f"Team {t}")
+    suburb_map = {}
+    for k in range(suburbs):
+        count = 2 if groups > 1 and rng.random() < 1 / 3 else 1
+        suburb_map[f"Suburb {k}"] = [names[g] for g in sorted(rng.choice(groups, count, replace=False).tolist())]
+    limits = {team: float(rng.choice([30, 38, 45])) for members in mapping.values() for team in members}
+    return {"TEAM_NAME_MAPPING": mapping, "SUBURB_TO_COMBINED_TEAM": suburb_map, "WEEKLY_HOUR_LIMITS": limits}
+
+
+def measure(func, *args, memory=False, **kwargs):
+    """
+    Run ``func`` once; returns its result and a dict of wall and CPU
+    seconds, plus the peak traced allocation in MB with ``memory`` (which
+    slows the call down, so compare timings only between runs made alike).
+    """
+    if memory:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = func(*args, **kwargs)
+    stats = {"wall_s": round(time.perf_counter() - wall, 4), "cpu_s": round(time.process_time() - cpu, 4)}
+    if memory:
+        stats["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        tracemalloc.stop()
+    return result, stats
+
+
+def bench_pipeline(config, csv_path, out_dir, stages=STAGES, engines=("greedy",), memory=False):
+    """
+    Run the CLI pipeline on ``csv_path`` and measure the chosen stages.
+
+    Every stage up to the last chosen one runs; ``assign_parks`` runs once
+    per engine and the later stages use the first engine's schedule.
+
+    Returns:
+        list: One dict per measured stage (and engine), with "stage",
+        "engine", "rows" (items the stage produced or consumed) and the
+        ``measure`` figures.
+    """
+    last = max(STAGES.index(stage) for stage in stages)
+    results = []
+
+    def record(stage, stats, rows, engine=None):
+        if stage in stages:
+            results.append({"stage": stage, "engine": engine, "rows": rows, **stats})
+
+    parks, stats = measure(load_parks_from_csv, csv_path, memory=memory)
+    record("load_csv", stats, len(parks))
+    if last < STAGES.index("assign_parks"):
+        return results
+    scheduler = None
+    for engine in engines:
+        candidate = MowingScheduler(config, parks)
+        _, stats = measure(candidate.assign_parks, engine=engine, memory=memory)
+        record("assign_parks", stats, len(candidate.jobs), engine)
+        scheduler = scheduler or candidate
+    if last < STAGES.index("export_jobs"):
+        return results
+
+    df, stats = measure(lambda: scheduler.add_week_and_weekday(scheduler.export_jobs_to_df()), memory=memory)
+    record("export_jobs", stats, len(df))
+    calendar_df, stats = measure(scheduler.build_calendar, df, memory=memory)
+    record("build_calendar", stats, len(df))
+    metrics_df, stats = measure(scheduler.generate_metrics, df, memory=memory)
+    record("generate_metrics", stats, len(df))
+    output = str(Path(out_dir) / "benchmark.xlsx")
+    if last >= STAGES.index("excel"):
+        _, stats = measure(export_to_excel, df, calendar_df, metrics_df, filename=output, memory=memory)
+        record("excel", stats, len(df))
+    if last >= STAGES.index("gantt"):
+        _, stats = measure(export_gantt_chart, df, filename=output, calendar=scheduler.day_tracker.calendar,
+                           labels=False, memory=memory)
+        record("gantt", stats, len(df))
+    return results
+
+
+def run_suite(config, sizes, stages=STAGES, engines=("greedy",), teams=48, groups=6, suburbs=40, area="lognormal",
+              dependency_density=0.0, located=False, memory=False, seed=0):
+    """Benchmark ``bench_pipeline`` on synthetic parks of each size; returns the result rows."""
+    config = {**config, **synthetic_fleet(teams, groups, suburbs, seed)}
+    rows = []
+    for n in sizes:
+        parks, dependencies = synthetic_parks(n, suburbs, area, dependency_density=dependency_density,
+                                              located=located, seed=seed)
+        run_config = {**config, "DEPENDENCIES": dependencies}
+        with tempfile.TemporaryDirectory() as out_dir:
+            csv_path = Path(out_dir) / "parks.csv"
+            parks.to_csv(csv_path, index=False)
+            for result in bench_pipeline(run_config, csv_path, out_dir, stages, engines, memory):
+                rows.append({"parks": n, "teams": teams, **result})
+                print(f"{result['stage']:<18}{n:>9}{result['engine'] or '':>8}{result['rows']:>10}"
+                      f"{result['wall_s']:>10.3f}{result['cpu_s']:>10.3f}"
+                      f"{result['peak_mb'] if memory else '':>10}", flush=True)
+    return rows
+
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Rows of ``results`` more than ``tolerance`` (a fraction) slower than
+    the baseline row for the same stage, size, team count and engine, as
+    (row, baseline wall seconds) pairs.
+    """
+    def key(row):
+        return row["stage"], row["parks"], row["teams"], row["engine"]
+
+    previous = {key(row): row["wall_s"] for row in baseline}
+    return [(row, previous[key(row)]) for row in results
+            if key(row) in previous and row["wall_s"] > previous[key(row)] * (1 + tolerance)]
+
+
+def legacy_build_calendar(df, week_range=None):
+    """Row-by-row calendar builder the vectorized version replaced; kept as the reference."""
+    calendar = {}
+    for _, row in df.iterrows():
+        week = row['Week']
+        if week_range and week not in week_range:
+            continue
+        text = f"{row['Park']} ({row['Estimated Hours']}h)"
+        calendar.setdefault(row['Team'], {}).setdefault(week, {}).setdefault(row['Weekday'], []).append(text)
+
+    all_weeks = sorted({w for t in calendar.values() for w in t})
+    rows = []
+    for team in sorted(calendar):
+        row = {"Team": team}
+        for week in all_weeks:
+            for day in WEEKDAYS:
+                row[f"W{week} {day}"] = "\n".join(sorted(calendar[team].get(week, {}).get(day, [])))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def legacy_generate_metrics(df):
+    """Multi-pass metrics the single-pass version replaced; kept as the reference."""
+    overtime = df["Overtime"].astype(bool)
+    total_hours = df.groupby("Team")["Estimated Hours"].sum()
+    total_overtime_hours = df.loc[overtime].groupby("Team")["Estimated Hours"].sum()
+    summary = pd.DataFrame({
+        "Total_Parks": df.groupby("Team")["Park"].nunique(),
+        "Total_Area_Sqm": df.groupby("Team")["Area (sqm)"].sum(),
+        "Total_Hours": total_hours,
+        "Days_Worked": df.groupby("Team")["Day"].nunique(),
+        "Total_Overtime_Hours": total_overtime_hours.reindex(total_hours.index, fill_value=0),
+    }).fillna(0)
+    summary["Avg_Hours_Per_Day"] = (summary["Total_Hours"] / summary["Days_Worked"].replace(0, 1)).round(2)
+    return summary.round(2)
+
+
+def timed(func, *args, repeat=1):
+    """Best wall time of ``repeat`` calls, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_reports(scheduler, df, repeat=1):
+    """Time the report builders against their legacy versions and check the outputs match."""
+    results = []
+    for name, legacy, current in [
+        ("build_calendar", legacy_build_calendar, scheduler.build_calendar),
+        ("generate_metrics", legacy_generate_metrics, scheduler.generate_metrics),
+    ]:
+        legacy_time, expected = timed(legacy, df, repeat=repeat)
+        current_time, actual = timed(current, df, repeat=repeat)
+        pd.testing.assert_frame_equal(actual, expected)
+        results.append((name, legacy_time, current_time))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report generation and the scheduling pipeline")
+    parser.add_argument("--config", default="config.json", help="Config file")
+    parser.add_argument("--rows", type=int, nargs="*",
+                        help="Job table sizes to time the report builders on (default without --parks: 10000 100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    parser.add_argument("--parks", type=int, nargs="*", help="Synthetic park counts to run the whole pipeline on")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="Pipeline stages to measure")
+    parser.add_argument("--engines", nargs="+", choices=MowingScheduler.ENGINES, default=["greedy"],
+                        help="Assignment engines to time")
+    parser.add_argument("--teams", type=int, default=48, help="Synthetic fleet size")
+    parser.add_argument("--groups", type=int, default=6, help="Team groups in the synthetic fleet")
+    parser.add_argument("--suburbs", type=int, default=40, help="Suburbs in the synthetic parks")
+    parser.add_argument("--area", choices=AREA_DISTRIBUTIONS, default="lognormal", help="Park area distribution")
+    parser.add_argument("--dependency-density", type=float, default=0.0,
+                        help="Share of parks that depend on earlier parks")
+    parser.add_argument("--located", action="store_true", help="Give parks coordinates (nearby-park filling)")
+    parser.add_argument("--memory", action="store_true", help="Also trace peak memory per stage (slower)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data")
+    parser.add_argument("--json", help="Write the pipeline results and run details to this file")
+    parser.add_argument("--baseline", help="Earlier --json results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Slowdown over --baseline counted as a regression (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    rows = args.rows if args.rows is not None else ([] if args.parks else [10_000, 100_000])
+    if rows:
+        scheduler = MowingScheduler(config, [])
+        print(f"{'stage':<18}{'rows':>9}{'legacy s':>11}{'current s':>11}{'speedup':>9}")
+        for n in rows:
+            df = synthetic_jobs(n)
+            for name, legacy_time, current_time in bench_reports(scheduler, df, repeat=args.repeat):
+                print(f"{name:<18}{n:>9}{legacy_time:>11.3f}{current_time:>11.3f}{legacy_time / current_time:>8.1f}x")
+    if not args.parks:
+        return
+
+    print(f"{'stage':<18}{'parks':>9}{'engine':>8}{'rows':>10}{'wall s':>10}{'cpu s':>10}{'peak MB' if args.memory else '':>10}")
+    results = run_suite(config, args.parks, args.stages, args.engines, args.teams, args.groups, args.suburbs,
+                        args.area, args.dependency_density, args.located, args.memory, args.seed)
+    if args.json:
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "engine_version": MowingScheduler.ENGINE_VERSION,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "settings": {k: v for k, v in vars(args).items() if k not in ("json", "baseline", "rows", "repeat")},
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_results(results, baseline, args.tolerance)
+        for row, previous in regressions:
+            print(f"REGRESSION {row['stage']} ({row['parks']} parks, {row['engine'] or '-'}): "
+                  f"{row['wall_s']:.3f}s vs {previous:.3f}s")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
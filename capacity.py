@@ -0,0 +1,209 @@
+import heapq
+import logging
+from datetime import timedelta
+
+import numpy as np
+
+from park_loader import ParkTable
+from scheduler import MowingScheduler
+from utils import WorkingCalendar
+
+# Most distinct sets of team groups checked by the lower bound
+MAX_BOUND_SETS = 256
+
+
+class CapacityPlanner:
+    """
+    Search for the cheapest crew setup that finishes every park by a deadline.
+
+    A candidate is a number of teams per group of TEAM_NAME_MAPPING plus one
+    of ``options``, each an ``(allow overtime, weekly hour limit)`` pair
+    (a limit of None keeps WEEKLY_HOUR_LIMITS). Groups shrink by dropping
+    their last teams and grow with new "<group> Extra <n>" teams.
+    Candidates are ranked by total teams, then by their option's position in
+    ``options``, so list options from cheapest to dearest.
+
+    The search is best-first from the smallest team counts the capacity
+    bound allows. Each candidate is first checked against that bound: the
+    work of every set of suburbs that only some groups may mow must fit in
+    those groups' hours up to the deadline. Only candidates that pass get a
+    full ``assign_parks`` run. A failing candidate is followed by ones with
+    an extra team in a group that fell short (the groups of the violated
+    bound, or the groups with teams still working after the deadline).
+
+    Args:
+        config (dict): Configuration from ``load_config``.
+        parks (ParkTable | list): Parks to schedule.
+        deadline (date): Last date work may be scheduled on.
+        options (list, optional): ``(allow overtime, weekly limit)`` pairs;
+            by default no overtime, then overtime, with the configured limits.
+        max_teams_per_group (int, optional): Largest team count tried per
+            group (default: twice the configured count, at least 4).
+        engine (str): Assignment engine for the full runs.
+    """
+
+    def __init__(self, config, parks, deadline, options=None, max_teams_per_group=None, engine="greedy"):
+        self.config = config
+        self.parks = ParkTable.coerce(parks)
+        self.deadline = deadline
+        self.options = list(options) if options else [(False, None), (True, None)]
+        self.engine = engine
+        self.groups = list(config["TEAM_NAME_MAPPING"])
+        self.max_teams = [
+            max_teams_per_group or max(4, 2 * len(config["TEAM_NAME_MAPPING"][g])) for g in self.groups
+        ]
+        self.full_runs = 0
+        self.pruned = 0
+
+        calendar = WorkingCalendar(config["START_DATE"], config["SKIPPED_DATES"],
+                                   config["DEFAULT_WORKDAYS_PER_WEEK"], config.get("NON_WORKING_WEEKDAYS", (6,)))
+        # Working days on or before the deadline
+        self.deadline_day = calendar.get_next_day(deadline + timedelta(days=1)) - 1
+        self.unavailable_day = {
+            team: calendar.get_next_day(d) - 1 for team, d in config.get("TEAM_UNAVAILABLE_FROM", {}).items()
+        }
+
+        # Hours of work per distinct set of allowed groups
+        hours = self.parks.area_sqm / config["DEFAULT_MOWING_RATE_SQM_PER_HOUR"] * (1 + config["DEFAULT_BUFFER"])
+        demand = {}
+        for suburb, h in zip(self.parks.suburb.tolist(), hours.tolist()):
+            if h > 0:
+                allowed = frozenset(config["SUBURB_TO_COMBINED_TEAM"].get(suburb, self.groups))
+                demand[allowed] = demand.get(allowed, 0.0) + h
+        self.demand = demand
+        self.bound_sets = self._bound_sets(list(demand))
+
+    @staticmethod
+    def _bound_sets(allowed_sets):
+        """Allowed group sets closed under union (up to MAX_BOUND_SETS), smallest first."""
+        sets = set(allowed_sets)
+        frontier = list(sets)
+        while frontier and len(sets) < MAX_BOUND_SETS:
+            new = {a | b for a in frontier for b in allowed_sets} - sets
+            sets |= new
+            frontier = list(new)
+        return sorted(sets, key=len)
+
+    def candidate_config(self, counts, option):
+        """Config with ``counts`` teams per group and the given ``(overtime, weekly limit)`` option."""
+        allow_overtime, weekly_limit = option
+        config = dict(self.config)
+        mapping = {}
+        limits = dict(self.config["WEEKLY_HOUR_LIMITS"])
+        for group, count in zip(self.groups, counts):
+            teams = list(self.config["TEAM_NAME_MAPPING"][group])
+            extra_limit = max((limits.get(t, np.inf) for t in teams), default=np.inf)
+            for n in range(1, count - len(teams) + 1):
+                teams.append(f"{group} Extra {n}")
+                if np.isfinite(extra_limit):
+                    limits[teams[-1]] = extra_limit
+            mapping[group] = teams[:count]
+        if weekly_limit is not None:
+            limits = {t: weekly_limit for teams in mapping.values() for t in teams}
+        config["TEAM_NAME_MAPPING"] = mapping
+        config["WEEKLY_HOUR_LIMITS"] = limits
+        config["ALLOW_OVERTIME"] = allow_overtime
+        return config
+
+    def _team_capacity(self, config, team):
+        """Most hours ``team`` can work up to the deadline."""
+        days = min(self.deadline_day, self.unavailable_day.get(team, self.deadline_day))
+        if days <= 0:
+            return 0.0
+        daily = config["DEFAULT_WORKDAY_HOURS"] + (config["MAX_OVERTIME_HOURS_PER_DAY"] if config["ALLOW_OVERTIME"] else 0)
+        per_week = config["DEFAULT_WORKDAYS_PER_WEEK"]
+        weekly = config["WEEKLY_HOUR_LIMITS"].get(team, np.inf)
+        full_weeks, rest = divmod(days, per_week)
+        return full_weeks * min(per_week * daily, weekly) + min(rest * daily, weekly)
+
+    def violated_bound(self, config):
+        """
+        The first set of groups whose parks cannot fit in their teams' hours
+        by the deadline, or None if the bound allows the candidate.
+        """
+        capacity = {}
+        for groups in self.bound_sets:
+            teams = {t for g in groups for t in config["TEAM_NAME_MAPPING"][g]}
+            hours = sum(capacity.setdefault(t, self._team_capacity(config, t)) for t in teams)
+            need = sum(h for allowed, h in self.demand.items() if allowed <= groups)
+            if need > hours + MowingScheduler.ROUNDING_TOLERANCE:
+                return groups
+        return None
+
+    def _minimum_counts(self, option):
+        """Smallest team count per group the bound allows on its own (others at their maximum)."""
+        counts = []
+        for i in range(len(self.groups)):
+            lo, hi = 1, self.max_teams[i]
+            # Bisection: the bound only gets easier with more teams
+            while lo < hi:
+                mid = (lo + hi) // 2
+                trial = self.max_teams[:i] + [mid] + self.max_teams[i + 1:]
+                if self.violated_bound(self.candidate_config(trial, option)) is None:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            counts.append(lo)
+        return counts
+
+    def evaluate(self, config):
+        """
+        Fully schedule a candidate. Returns its finish day and the groups with
+        teams working past the deadline (every group if some park could not
+        be placed).
+        """
+        self.full_runs += 1
+        scheduler = MowingScheduler(config, self.parks)
+        scheduler.assign_parks(engine=self.engine)
+        placed = set(self.parks.name[self.parks.area_sqm > 0].tolist()) <= scheduler.completed_jobs
+        if not placed:
+            return None, set(self.groups)
+        ledger = scheduler.ledger
+        late_teams = {ledger.teams[t] for t in np.flatnonzero(ledger.day_hours[:, self.deadline_day + 1:].sum(axis=1) > 0)}
+        late = {g for g, teams in config["TEAM_NAME_MAPPING"].items() if late_teams & set(teams)}
+        return ledger.last_day, late
+
+    def solve(self):
+        """
+        Run the search.
+
+        Returns:
+            dict | None: The cheapest candidate found, with its "counts" per
+            group, "allow_overtime", "weekly_limit", "finish_date" and
+            "config", or None if nothing within the limits meets the deadline.
+        """
+        heap = []
+        seen = set()
+
+        def push(counts, option_index):
+            key = (tuple(counts), option_index)
+            if key not in seen and all(c <= m for c, m in zip(counts, self.max_teams)):
+                seen.add(key)
+                heapq.heappush(heap, (sum(counts), option_index, tuple(counts)))
+
+        for i, option in enumerate(self.options):
+            push(self._minimum_counts(option), i)
+
+        while heap:
+            _, i, counts = heapq.heappop(heap)
+            option = self.options[i]
+            config = self.candidate_config(counts, option)
+            short = self.violated_bound(config)
+            if short is not None:
+                self.pruned += 1
+            else:
+                finish_day, short = self.evaluate(config)
+                logging.debug(f"{dict(zip(self.groups, counts))} {option}: finish day {finish_day}")
+                if finish_day is not None and finish_day <= self.deadline_day:
+                    scheduler = MowingScheduler(config, [])
+                    return {
+                        "counts": dict(zip(self.groups, counts)),
+                        "allow_overtime": option[0],
+                        "weekly_limit": option[1],
+                        "finish_date": scheduler.day_tracker.get_date(finish_day),
+                        "config": config,
+                    }
+            for g, group in enumerate(self.groups):
+                if group in short:
+                    push(counts[:g] + (counts[g] + 1,) + counts[g + 1:], i)
+        return None
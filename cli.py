@@ -2,6 +2,7 @@ import argparse
 import logging
 import os
 import sys
+from datetime import date
 from pathlib import Path
 from typing import List, Optional
 
@@ -10,11 +11,24 @@ script_dir = Path(__file__).resolve().parent
 os.chdir(script_dir)
 sys.path.insert(0, str(script_dir))
 
+# pandas, openpyxl and matplotlib load only when a stage needs them: the
+# report modules import them when called, and modules built on pandas
+# (simulation, incremental, schedule_store) are imported in their branch below.
 from config_loader import load_config
-from park_loader import load_parks_from_csv
-from scheduler import MowingScheduler
-from excel_export import export_to_excel
-from gantt import export_gantt_chart
+from park_loader import MAX_REPORTED_ROWS, check_parks_csv, load_parks_from_csv
+from scheduler import MowingScheduler, compare_engines
+from schedule_cache import DEFAULT_CACHE_DIR, ScheduleCache
+from sinks import JOB_COLUMNS, SINKS, open_sink
+from capacity import CapacityPlanner
+from optimizer import improve_schedule
+from instrumentation import Instrumentation, profiled
+from excel_export import SPLIT_MODES, export_simulation_report, export_to_excel
+from gantt import FORMATS, PAGE_MODES, export_gantt_chart
+from utils import format_table
+
+OUTPUTS = ("excel", "gantt", "metrics", "jsonl")
+# Outputs built from the job DataFrame; runs without them never import pandas
+FRAME_OUTPUTS = {"excel", "gantt"}
 
 
 def parse_args() -> argparse.Namespace:
@@ -28,6 +42,125 @@ def parse_args() -> argparse.Namespace:
         help="Weeks to include in output (e.g. --weeks 1 2 3). If omitted, all weeks are included.",
     )
     parser.add_argument("--output", default="mowing_team_schedule.xlsx", help="Output Excel filename")
+    parser.add_argument(
+        "--outputs",
+        nargs="+",
+        choices=OUTPUTS,
+        default=["excel", "gantt"],
+        help="Outputs to produce (default: excel gantt): the workbook, the Gantt pages, a plain-text metrics table "
+             "on stdout and/or the jobs as JSON lines next to --output. Without excel and gantt, pandas, openpyxl "
+             "and matplotlib are never imported",
+    )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Check the config and parks CSV (team mappings, invalid rows, dependency cycles and unknown prerequisites) without scheduling",
+    )
+    parser.add_argument(
+        "--excel-split",
+        choices=SPLIT_MODES,
+        help="Write the job list as one sheet per team or per month instead of a single sheet",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=MowingScheduler.ENGINES,
+        default="greedy",
+        help="Assignment engine (default: greedy). 'event' is faster for large fleets and gives the same schedule.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Schedule independent team regions and render Gantt pages in this many worker processes (default: 1)",
+    )
+    parser.add_argument(
+        "--compare-engines",
+        action="store_true",
+        help="Run every assignment engine on the input and check they produce identical jobs",
+    )
+    parser.add_argument(
+        "--simulate",
+        type=int,
+        metavar="RUNS",
+        help="Schedule RUNS random weather scenarios (RAIN_PROBABILITY_BY_MONTH) across --workers processes "
+             "and report completion-date percentiles instead of a schedule",
+    )
+    parser.add_argument(
+        "--optimize",
+        type=float,
+        metavar="SECONDS",
+        help="After scheduling, spend up to SECONDS moving and swapping job chunks to cut splits, makespan, "
+             "load imbalance and overtime",
+    )
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for --simulate weather draws and --optimize moves (default: 0)")
+    parser.add_argument(
+        "--plan-deadline",
+        type=date.fromisoformat,
+        metavar="YYYY-MM-DD",
+        help="Find the fewest teams per group (and whether overtime is needed) to finish every park by this date",
+    )
+    parser.add_argument(
+        "--plan-weekly-limits",
+        type=float,
+        nargs="*",
+        default=[],
+        metavar="HOURS",
+        help="Uniform weekly hour limits --plan-deadline may also try, cheapest first",
+    )
+    parser.add_argument("--plan-max-teams", type=int, help="Most teams --plan-deadline tries per group")
+    parser.add_argument("--save-jobs", help="Also save the job table as CSV (input for --reschedule)")
+    parser.add_argument(
+        "--stream-jobs",
+        metavar="PATH",
+        help="Write jobs to PATH ('-' for stdout) as they are scheduled and skip the reports; "
+             "memory stays flat for long horizons",
+    )
+    parser.add_argument(
+        "--stream-format",
+        choices=sorted(SINKS),
+        help="Format for --stream-jobs (default: from the file extension; JSONL for stdout)",
+    )
+    parser.add_argument(
+        "--reschedule",
+        metavar="SAVED_JOBS_CSV",
+        help="Re-plan a schedule saved with --save-jobs after the changes in --delta, keeping earlier work",
+    )
+    parser.add_argument("--delta", help="JSON file describing schedule changes (used with --reschedule)")
+    parser.add_argument(
+        "--serve",
+        type=int,
+        metavar="PORT",
+        help="Keep the schedule in memory and answer JSON queries over HTTP on PORT instead of writing reports",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address for --serve (default: 127.0.0.1)")
+    parser.add_argument(
+        "--gantt-pages",
+        choices=PAGE_MODES,
+        default="week",
+        help="Gantt chart pages: one per week (default) or one per block of teams",
+    )
+    parser.add_argument("--gantt-format", choices=FORMATS, default="png", help="Gantt chart file format")
+    parser.add_argument("--gantt-dpi", type=int, default=150, help="Resolution of PNG Gantt pages")
+    parser.add_argument(
+        "--gantt-no-labels",
+        action="store_true",
+        help="Draw Gantt bars without job labels (much faster for long schedules)",
+    )
+    parser.add_argument(
+        "--park-sidecar",
+        action="store_true",
+        help="Keep a binary copy of the parsed parks next to the CSV and reuse it while the CSV is unchanged",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Always recompute the schedule")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directory for cached schedules")
+    parser.add_argument(
+        "--report-json",
+        metavar="PATH",
+        help="Write per-stage wall/CPU times and scheduler counters (placement rounds, day advances, "
+             "heap rebuilds, date lookups, chunks per job) to PATH as JSON",
+    )
+    parser.add_argument("--profile", metavar="PATH", help="Run under cProfile and save the stats to PATH")
     parser.add_argument("--test", action="store_true", help="Run unit tests")
     parser.add_argument(
         "-v", "--verbose", action="store_true", help="Enable verbose logging (DEBUG level)"
@@ -35,6 +168,65 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def run_simulation(args: argparse.Namespace, config: dict, parks) -> None:
+    """Run the weather simulation and save its report next to --output."""
+    from simulation import simulate, summarize
+
+    try:
+        runs_df, hours_df, finish_df = simulate(
+            config, parks, args.simulate, engine=args.engine, workers=args.workers, seed=args.seed)
+    except ValueError as e:
+        logging.error(f"Failed to simulate: {e}")
+        return
+    summary_df, teams_df = summarize(runs_df, hours_df, finish_df)
+
+    report_file = Path(args.output).with_suffix(".simulation.xlsx")
+    export_simulation_report(summary_df, teams_df, runs_df, filename=report_file)
+
+    overtime_share = (runs_df["Overtime_Hours"] > 0).mean()
+    logging.info(f"🌧️ Completion over {len(runs_df)} weather scenarios:\n" + summary_df.to_string(index=False))
+    logging.info(f"{overtime_share:.0%} of scenarios need overtime")
+    logging.info("Team loads:\n" + teams_df.to_string(index=False))
+    logging.info(f"Simulation report saved to {report_file}")
+
+
+def run_capacity_plan(args: argparse.Namespace, config: dict, parks) -> None:
+    """Search for the cheapest team setup that meets --plan-deadline and log it."""
+    # Without overtime before with it; configured limits before the extra ones
+    options = [(overtime, limit) for overtime in (False, True) for limit in [None, *args.plan_weekly_limits]]
+    planner = CapacityPlanner(config, parks, args.plan_deadline, options=options,
+                              max_teams_per_group=args.plan_max_teams, engine=args.engine)
+    plan = planner.solve()
+    logging.info(f"Checked {planner.full_runs + planner.pruned} setups: {planner.pruned} ruled out by the "
+                 f"capacity bound, {planner.full_runs} fully scheduled")
+    if plan is None:
+        logging.error(f"No setup within the team limits finishes by {args.plan_deadline}")
+        return
+    limit = "configured weekly limits" if plan["weekly_limit"] is None else f"{plan['weekly_limit']:g}h weekly limit"
+    logging.info(f"Cheapest setup finishing by {args.plan_deadline}: {sum(plan['counts'].values())} teams "
+                 f"({', '.join(f'{g}: {n}' for g, n in plan['counts'].items())}), "
+                 f"{'with' if plan['allow_overtime'] else 'no'} overtime, {limit}; last work on {plan['finish_date']}")
+    logging.info(f"TEAM_NAME_MAPPING: {plan['config']['TEAM_NAME_MAPPING']}")
+
+
+def write_outputs(args: argparse.Namespace, metrics, jobs) -> None:
+    """
+    Write the plain outputs in --outputs: the metrics table (rows from
+    calling ``metrics``) on stdout and the ``jobs`` rows as JSON lines.
+    """
+    if "metrics" in args.outputs:
+        rows = metrics()
+        if rows:
+            print(format_table(rows))
+        else:
+            logging.warning("No jobs to summarise")
+    if "jsonl" in args.outputs:
+        jobs_file = Path(args.output).with_suffix(".jsonl")
+        with open_sink(jobs_file, "jsonl") as sink:
+            count = sink.write_all(jobs)
+        logging.info(f"{count} jobs saved to {jobs_file}")
+
+
 def main() -> None:
     args = parse_args()
 
@@ -43,44 +235,206 @@ def main() -> None:
 
     if args.test:
         import unittest
-        unittest.main(argv=["first-arg-is-ignored"], exit=False)
-        return
+        tests = unittest.defaultTestLoader.discover(str(script_dir), pattern="test_*.py")
+        result = unittest.TextTestRunner(verbosity=2 if args.verbose else 1).run(tests)
+        sys.exit(0 if result.wasSuccessful() else 1)
+
+    instrumentation = Instrumentation(enabled=bool(args.report_json))
+    try:
+        if args.profile:
+            profiled(run, args.profile, args, instrumentation)
+        else:
+            run(args, instrumentation)
+    finally:
+        if args.report_json:
+            instrumentation.write(args.report_json)
+            logging.info(f"Run report saved to {args.report_json}")
+
 
+def run(args: argparse.Namespace, instrumentation: Instrumentation) -> None:
+    """The CLI pipeline, with each stage timed by ``instrumentation``."""
+    stage = instrumentation.stage
     try:
-        config = load_config(args.config)
+        with stage("load_config"):
+            config = load_config(args.config)
     except Exception as e:
         logging.error(f"Failed to load config: {e}")
         return
 
-    try:
-        parks = load_parks_from_csv(args.csv)
-    except Exception as e:
-        logging.error(f"Failed to load parks from CSV: {e}")
+    # Cached schedules are DataFrames, so only runs that build frames use them
+    light = args.validate_only or not FRAME_OUTPUTS & set(args.outputs)
+    cache = None if (args.no_cache or args.reschedule or args.compare_engines or args.stream_jobs or args.simulate
+                     or args.plan_deadline or args.optimize or light) else ScheduleCache(args.cache_dir)
+    df_jobs = None
+    if cache is not None:
+        try:
+            with stage("cache_load"):
+                cache_key = cache.key(args.csv, config, args.engine, MowingScheduler.ENGINE_VERSION)
+                df_jobs = cache.load(cache_key)
+        except OSError:
+            cache = None  # unreadable CSV; reported by the loader below
+    if df_jobs is None or args.serve:
+        try:
+            with stage("load_csv"):
+                if args.validate_only:
+                    # Keep the rejected rows so they fail validation instead of being skipped
+                    parks, row_problems = check_parks_csv(args.csv, reader="csv")
+                else:
+                    parks = load_parks_from_csv(args.csv, sidecar=args.park_sidecar, reader="csv" if light else "pandas")
+        except Exception as e:
+            logging.error(f"Failed to load parks from CSV: {e}")
+            return
+    if df_jobs is not None:
+        logging.info("Using cached schedule")
+        # Serving needs the parks to re-plan deltas
+        scheduler = MowingScheduler(config, parks if args.serve else [])
+
+    if args.validate_only:
+        with stage("validate"):
+            scheduler = MowingScheduler(config, parks)
+            problems = scheduler.validate()
+        csv_name = Path(args.csv).name
+        for line, message in row_problems[:MAX_REPORTED_ROWS]:
+            logging.error(f"{csv_name} line {line}: {message}")
+        if len(row_problems) > MAX_REPORTED_ROWS:
+            logging.error(f"... and {len(row_problems) - MAX_REPORTED_ROWS} more invalid rows")
+        if row_problems:
+            problems.append(f"{len(row_problems)} invalid row(s) in {csv_name}")
+        for problem in problems:
+            logging.error(problem)
+        if problems:
+            sys.exit(1)
+        logging.info(f"✅ {args.config} and {len(parks)} parks from {args.csv} are valid: "
+                     f"{len(scheduler.team_names())} teams, {len(set(parks.suburb.tolist()))} suburbs")
+        return
+
+    if args.compare_engines:
+        with stage("compare_engines"):
+            agree = compare_engines(config, parks)
+        sys.exit(0 if agree else 1)
+
+    if args.simulate:
+        with stage("simulate"):
+            run_simulation(args, config, parks)
+        return
+
+    if args.plan_deadline:
+        with stage("capacity_plan"):
+            run_capacity_plan(args, config, parks)
+        return
+
+    if args.stream_jobs:
+        scheduler = instrumentation.attach(MowingScheduler(config, parks))
+        try:
+            with stage("stream_jobs"), open_sink(args.stream_jobs, args.stream_format) as sink:
+                count = sink.write_all(scheduler.iter_jobs(engine=args.engine))
+        except (OSError, ValueError, ImportError) as e:
+            logging.error(f"Failed to stream jobs: {e}")
+            return
+        logging.info(f"Streamed {count} jobs to {args.stream_jobs}")
         return
 
-    scheduler = MowingScheduler(config, parks)
-    scheduler.assign_parks()
-    df_jobs = scheduler.export_jobs_to_df()
-    df_jobs = scheduler.add_week_and_weekday(df_jobs)
+    if args.reschedule:
+        if not args.delta:
+            logging.error("--reschedule needs --delta")
+            return
+        import pandas as pd
+        from incremental import load_delta, reschedule
 
-    # Filter weeks if specified
-    if args.weeks:
-        missing_weeks = set(args.weeks) - set(df_jobs["Week"].unique())
-        if missing_weeks:
-            logging.warning(f"Requested weeks {sorted(missing_weeks)} not found in data.")
-        df_jobs_filtered = df_jobs[df_jobs["Week"].isin(args.weeks)]
-    else:
-        df_jobs_filtered = df_jobs
+        try:
+            with stage("reschedule"):
+                saved_jobs = pd.read_csv(args.reschedule)
+                delta = load_delta(args.delta)
+                scheduler, df_jobs, diff = reschedule(config, parks, saved_jobs, delta, engine=args.engine)
+        except (OSError, ValueError, KeyError) as e:
+            logging.error(f"Failed to reschedule: {e}")
+            return
+        diff_file = Path(args.output).with_suffix(".diff.csv")
+        diff.to_csv(diff_file, index=False)
+        logging.info(f"{(diff['Change'] == 'removed').sum()} jobs removed, {(diff['Change'] == 'added').sum()} added; "
+                     f"diff saved to {diff_file}")
+    elif df_jobs is None:
+        scheduler = instrumentation.attach(MowingScheduler(config, parks))
+        try:
+            with stage("assign_parks"):
+                scheduler.assign_parks(engine=args.engine, workers=args.workers)
+        except ValueError as e:
+            logging.error(f"Failed to schedule parks: {e}")
+            return
+        if args.optimize:
+            with stage("optimize"):
+                result = improve_schedule(scheduler, time_limit=args.optimize, seed=args.seed)
+            logging.info(f"Local search kept {result['accepted']} of {result['iterations']} candidates: "
+                         + ", ".join(f"{k} {result['before'][k]} -> {v}" for k, v in result["after"].items()))
+        if not light or args.save_jobs or args.serve:
+            with stage("export_jobs"):
+                df_jobs = scheduler.export_jobs_to_df()
+        if cache is not None:
+            with stage("cache_store"):
+                cache.store(cache_key, df_jobs)
 
-    calendar_df = scheduler.build_calendar(df_jobs_filtered, args.weeks)
-    metrics_df = scheduler.generate_metrics(df_jobs_filtered)
+    if args.save_jobs:
+        with stage("save_jobs"):
+            df_jobs.to_csv(args.save_jobs, index=False)
 
-    export_to_excel(df_jobs_filtered, calendar_df, metrics_df, filename=args.output)
-    export_gantt_chart(df_jobs_filtered, filename=args.output)
+    if args.serve:
+        from schedule_store import ScheduleStore
+        from server import serve
+
+        serve(ScheduleStore(scheduler.config, scheduler.parks, df_jobs, engine=args.engine), host=args.host, port=args.serve)
+        return
+
+    if light:
+        # Straight from the scheduler's job table, without DataFrames
+        calendar = scheduler.day_tracker.calendar
+        rows = scheduler.job_rows()
+        if args.weeks:
+            rows = (row for row in rows if calendar.get_week(row["Day"]) in args.weeks)
+        with stage("write_outputs"):
+            write_outputs(args, lambda: scheduler.team_summary(args.weeks), rows)
+        return
+
+    with stage("prepare_jobs"):
+        df_jobs = scheduler.add_week_and_weekday(df_jobs)
+
+        # Filter weeks if specified
+        if args.weeks:
+            missing_weeks = set(args.weeks) - set(df_jobs["Week"].unique())
+            if missing_weeks:
+                logging.warning(f"Requested weeks {sorted(missing_weeks)} not found in data.")
+            df_jobs_filtered = df_jobs[df_jobs["Week"].isin(args.weeks)]
+        else:
+            df_jobs_filtered = df_jobs
+
+    with stage("build_calendar"):
+        calendar_df = scheduler.build_calendar(df_jobs_filtered, args.weeks)
+    with stage("generate_metrics"):
+        metrics_df = scheduler.generate_metrics(df_jobs_filtered)
+        travel_df = scheduler.travel_by_team_day(df_jobs_filtered) if "Latitude" in df_jobs_filtered else None
+
+    if "excel" in args.outputs:
+        with stage("excel"):
+            export_to_excel(df_jobs_filtered, calendar_df, metrics_df, filename=args.output,
+                            split_by=args.excel_split, travel_df=travel_df)
+    if "gantt" in args.outputs:
+        with stage("gantt"):
+            export_gantt_chart(
+                df_jobs_filtered,
+                filename=args.output,
+                calendar=scheduler.day_tracker.calendar,
+                page_by=args.gantt_pages,
+                fmt=args.gantt_format,
+                dpi=args.gantt_dpi,
+                workers=args.workers,
+                labels=not args.gantt_no_labels,
+            )
+    with stage("write_outputs"):
+        columns = [c for c in JOB_COLUMNS if c in df_jobs_filtered]
+        write_outputs(args, lambda: metrics_df.reset_index().to_dict("records"),
+                      df_jobs_filtered[columns].to_dict("records"))
 
     logging.info("📅 Calendar View Preview:\n" + calendar_df.head().to_string(index=False))
     logging.info("📊 Metrics Summary:\n" + metrics_df.to_string(index=False))
 
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,5 +1,5 @@
 import json
-from datetime import date, timedelta
+from datetime import date
 
 def load_config(config_path):
     with open(config_path) as f:
@@ -8,18 +8,53 @@ def load_config(config_path):
     config["PUBLIC_HOLIDAYS"] = {date.fromisoformat(d) for d in config["PUBLIC_HOLIDAYS"]}
     config["BAD_WEATHER_DAYS"] = {date.fromisoformat(d) for d in config.get("BAD_WEATHER_DAYS", [])}
 
-    # Automatically add Sundays as skipped dates
-    # Find a range to cover e.g. next 365 days from START_DATE
-    skipped = config["PUBLIC_HOLIDAYS"] | config["BAD_WEATHER_DAYS"]
-    start = config["START_DATE"]
-    end = start + timedelta(days=365)
-    current = start
-    while current <= end:
-        if current.weekday() == 6:  # Sunday == 6
-            skipped.add(current)
-        current += timedelta(days=1)
-
-    config["SKIPPED_DATES"] = skipped
+    # Weekdays that are never worked (Monday == 0). Sundays by default; the
+    # working calendar applies these for any horizon, so they are not expanded
+    # into SKIPPED_DATES.
+    config["NON_WORKING_WEEKDAYS"] = set(config.get("NON_WORKING_WEEKDAYS", [6]))
+    config["SKIPPED_DATES"] = config["PUBLIC_HOLIDAYS"] | config["BAD_WEATHER_DAYS"]
     config["DEPENDENCIES"] = config.get("DEPENDENCIES", {})
     config["HISTORICAL_HOURS"] = config.get("HISTORICAL_HOURS", {})
+    config["TEAM_UNAVAILABLE_FROM"] = {
+        team: date.fromisoformat(d) for team, d in config.get("TEAM_UNAVAILABLE_FROM", {}).items()
+    }
+
+    # Recurring mowing: a park is mowed again a set number of days after each
+    # visit finishes (per park from the CSV, else by priority), up to
+    # RECURRENCE_HORIZON_END. Seasons stretch or shorten the interval.
+    config["RECURRENCE_DAYS_BY_PRIORITY"] = {
+        int(priority): int(days) for priority, days in config.get("RECURRENCE_DAYS_BY_PRIORITY", {}).items()
+    }
+    horizon = config.get("RECURRENCE_HORIZON_END")
+    config["RECURRENCE_HORIZON_END"] = date.fromisoformat(horizon) if horizon else None
+    config["RECURRENCE_SEASONS"] = [_parse_season(season) for season in config.get("RECURRENCE_SEASONS", [])]
+
+    # Weather model for --simulate: chance that a day is lost to rain, by
+    # month (1-12), with RAIN_PROBABILITY for months not listed.
+    config["RAIN_PROBABILITY"] = _parse_probability("RAIN_PROBABILITY", config.get("RAIN_PROBABILITY", 0.0))
+    config["RAIN_PROBABILITY_BY_MONTH"] = {
+        int(month): _parse_probability(f"RAIN_PROBABILITY_BY_MONTH[{month}]", p)
+        for month, p in config.get("RAIN_PROBABILITY_BY_MONTH", {}).items()
+    }
+    if not set(config["RAIN_PROBABILITY_BY_MONTH"]) <= set(range(1, 13)):
+        raise ValueError(f"RAIN_PROBABILITY_BY_MONTH months must be 1-12, got {sorted(config['RAIN_PROBABILITY_BY_MONTH'])}")
     return config
+
+
+def _parse_probability(key, value):
+    value = float(value)
+    # A certain washout would leave no working days at all
+    if not 0 <= value < 1:
+        raise ValueError(f"{key} must be at least 0 and below 1, got {value}")
+    return value
+
+
+def _parse_season(season):
+    """{"START": "MM-DD", "END": "MM-DD", "FACTOR": x} with the dates as (month, day)."""
+    try:
+        start, end = (tuple(int(part) for part in season[key].split("-")) for key in ("START", "END"))
+        # Validate against a leap year so 02-29 is accepted
+        date(2000, *start), date(2000, *end)
+        return {"START": start, "END": end, "FACTOR": float(season["FACTOR"])}
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid RECURRENCE_SEASONS entry {season!r}: expected START/END as MM-DD and FACTOR") from e
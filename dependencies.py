@@ -0,0 +1,70 @@
+class DependencyGraph:
+    """
+    Park dependencies parsed once into an indexed graph.
+
+    Nodes are park indices. ``DEPENDENCIES`` maps a park name to the names of
+    parks that must be finished first; a name shared by several parks refers
+    to all of them. Dependencies on names that are not in the park list can
+    never be met, so the dependent parks (and everything after them) stay
+    blocked; ``missing`` maps each such park name to its unknown prerequisites.
+
+    Args:
+        names (list): Park names, in park index order.
+        dependencies (dict): Park name -> list of prerequisite park names.
+
+    Raises:
+        ValueError: If the dependencies contain a cycle.
+    """
+
+    def __init__(self, names, dependencies):
+        self.names = list(names)
+        by_name = {}
+        for i, name in enumerate(self.names):
+            by_name.setdefault(name, []).append(i)
+
+        n = len(self.names)
+        self.successors = [[] for _ in range(n)]
+        self.predecessors = [[] for _ in range(n)]
+        self.indegree = [0] * n
+        self.missing = {}
+        for name, deps in dependencies.items():
+            for i in by_name.get(name, []):
+                for dep in deps:
+                    if dep not in by_name:
+                        self.missing.setdefault(name, []).append(dep)
+                        # An unmet prerequisite keeps the park blocked for good
+                        self.indegree[i] += 1
+                        continue
+                    for j in by_name[dep]:
+                        self.successors[j].append(i)
+                        self.predecessors[i].append(j)
+                        self.indegree[i] += 1
+
+        cycle = self.find_cycle()
+        if cycle:
+            raise ValueError("Dependency cycle: " + " -> ".join(self.names[i] for i in cycle))
+
+    def find_cycle(self):
+        """Return the park indices of one dependency cycle (first node repeated at the end), or []."""
+        indegree = [len(preds) for preds in self.predecessors]
+        stack = [i for i, d in enumerate(indegree) if d == 0]
+        while stack:
+            node = stack.pop()
+            for succ in self.successors[node]:
+                indegree[succ] -= 1
+                if indegree[succ] == 0:
+                    stack.append(succ)
+        remaining = [i for i, d in enumerate(indegree) if d > 0]
+        if not remaining:
+            return []
+        # Every remaining node has a remaining predecessor, so walking back
+        # along them must revisit a node.
+        seen = {}
+        path = []
+        node = remaining[0]
+        while node not in seen:
+            seen[node] = len(path)
+            path.append(node)
+            node = next(p for p in self.predecessors[node] if indegree[p] > 0)
+        cycle = path[seen[node]:] + [node]
+        return cycle[::-1]
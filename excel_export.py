@@ -1,30 +1,106 @@
+import re
 
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-from openpyxl.utils import get_column_letter
-
-OVERTIME_YES = "Yes"
-
-def apply_overtime_highlighting(ws):
-    header_row = [cell.value for cell in ws[1]]
-    try:
-        overtime_idx = header_row.index("Overtime")
-    except ValueError:
-        return
-    overtime_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
-    for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-        if row[overtime_idx].value == OVERTIME_YES:
-            for cell in row:
+# openpyxl is imported by the functions that write workbooks, so importing
+# this module (e.g. for SPLIT_MODES) stays cheap
+OVERTIME_COLOR = "FF0000"
+SPLIT_MODES = ("team", "month")
+# Rows converted to Python values at a time while streaming a sheet
+CHUNK_ROWS = 50_000
+MAX_SHEET_TITLE = 31
+
+
+def _sheet_title(name, used):
+    """Excel-safe, unique sheet title for ``name``."""
+    base = re.sub(r"[\[\]:*?/\\]", "_", str(name))[:MAX_SHEET_TITLE] or "Sheet"
+    title, n = base, 1
+    while title in used:
+        n += 1
+        suffix = f" ({n})"
+        title = base[:MAX_SHEET_TITLE - len(suffix)] + suffix
+    used.add(title)
+    return title
+
+
+def _iter_rows(df):
+    """Yield the rows of ``df`` as lists of plain Python values (NaN as None)."""
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS]
+        columns = []
+        for name in chunk.columns:
+            col = chunk[name]
+            if col.hasnans:
+                col = col.astype(object).where(col.notna(), None)
+            columns.append(col.tolist())
+        yield from map(list, zip(*columns))
+
+
+def write_sheet(wb, title, df, highlight_overtime=False):
+    """
+    Stream ``df`` (without its index) into a new sheet of the write-only
+    workbook ``wb``. With ``highlight_overtime``, rows whose Overtime value
+    is true are filled red as they are written.
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import PatternFill
+
+    overtime_fill = PatternFill(start_color=OVERTIME_COLOR, end_color=OVERTIME_COLOR, fill_type="solid")
+    ws = wb.create_sheet(title)
+    if len(df.columns):
+        ws.append([str(c) for c in df.columns])
+    overtime_idx = df.columns.get_loc("Overtime") if highlight_overtime and "Overtime" in df else None
+    for row in _iter_rows(df):
+        if overtime_idx is not None and row[overtime_idx]:
+            cells = []
+            for value in row:
+                cell = WriteOnlyCell(ws, value=value)
                 cell.fill = overtime_fill
+                cells.append(cell)
+            row = cells
+        ws.append(row)
+    return ws
 
-def export_to_excel(df_jobs, calendar_df, metrics_df, filename="mowing_team_schedule.xlsx"):
-    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-        df_jobs.to_excel(writer, sheet_name='Detailed Assignments', index=False)
-        calendar_df.to_excel(writer, sheet_name='Calendar View', index=False)
-        metrics_df.to_excel(writer, sheet_name='Metrics Summary', index=False)
-    wb = load_workbook(filename)
-    apply_overtime_highlighting(wb["Detailed Assignments"])
+
+def export_to_excel(df_jobs, calendar_df, metrics_df, filename="mowing_team_schedule.xlsx", split_by=None,
+                    travel_df=None):
+    """
+    Write the job table, calendar and metrics to ``filename`` in one pass.
+
+    The workbook is written in openpyxl's write-only mode, so rows are
+    streamed to disk rather than held in memory, and overtime rows are
+    highlighted while they are written.
+
+    Args:
+        split_by (str, optional): "team" or "month" to write the job table
+            as one sheet per team or per month instead of a single
+            'Detailed Assignments' sheet.
+        travel_df (DataFrame, optional): Travel per team-day, written as a
+            'Travel' sheet.
+    """
+    if split_by is not None and split_by not in SPLIT_MODES:
+        raise ValueError(f"Unknown split {split_by!r}; expected one of {SPLIT_MODES}")
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    used = {"Calendar View", "Metrics Summary", "Travel"}
+    if split_by is None:
+        write_sheet(wb, _sheet_title("Detailed Assignments", used), df_jobs, highlight_overtime=True)
+    else:
+        keys = df_jobs["Team"] if split_by == "team" else df_jobs["Date"].astype(str).str[:7]
+        for key, part in df_jobs.groupby(keys, sort=True):
+            write_sheet(wb, _sheet_title(key, used), part, highlight_overtime=True)
+    write_sheet(wb, "Calendar View", calendar_df)
+    write_sheet(wb, "Metrics Summary", metrics_df)
+    if travel_df is not None:
+        write_sheet(wb, "Travel", travel_df)
     wb.save(filename)
 
 
+def export_simulation_report(summary_df, teams_df, runs_df, filename):
+    """Write the percentile summary, per-team loads and every scenario of a weather simulation."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    write_sheet(wb, "Completion", summary_df)
+    write_sheet(wb, "Teams", teams_df)
+    write_sheet(wb, "Scenarios", runs_df)
+    wb.save(filename)
@@ -1,119 +1,219 @@
-import matplotlib
-matplotlib.use('Agg')
-
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
+
+# pandas and matplotlib are imported where they are used, so importing this
+# module (e.g. for PAGE_MODES) does not pay for them
+PAGE_MODES = ("week", "team")
+FORMATS = ("png", "svg")
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+WIDTH_PER_DAY = 3.0  # inches per weekday column
+LINE_HEIGHT = 0.13  # inches per job label line
+BAR_HEIGHT = 0.12  # inches for the day's bar strip at the top of a cell
+MIN_ROW_HEIGHT = 0.6
+ROW_PADDING = 0.15
+LABEL_WIDTH = 1.4  # inches reserved for row labels
+TITLE_HEIGHT = 0.8
+
+
+def _pyplot():
+    """matplotlib.pyplot on the non-interactive Agg backend."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
 
-def export_gantt_chart(df, filename="mowing_team_schedule.xlsx"):
-    df = df.copy()
-    if df.empty:
-        print("No data to generate calendar Gantt chart.")
-        return
 
+def _prepare(df, calendar):
+    """Parse and annotate the job table once for all pages."""
+    import pandas as pd
+
+    df = df.copy()
     df["Date"] = pd.to_datetime(df["Date"], errors='coerce')
     df["Estimated Hours"] = pd.to_numeric(df["Estimated Hours"], errors='coerce')
     df.dropna(subset=["Date", "Estimated Hours"], inplace=True)
-
+    if df.empty:
+        return df
+
+    if calendar is not None and "Day" in df.columns:
+        # Working weeks/weekdays come straight from the scheduler's calendar index
+        days = df["Day"].unique()
+        df["Week"] = df["Day"].map({d: calendar.get_week(d) for d in days})
+        df["Weekday"] = df["Day"].map({d: calendar.get_date(d).weekday() for d in days})  # Monday=0
+    else:
+        df["Week"] = df["Date"].dt.isocalendar().week.astype(int)
+        df["Weekday"] = df["Date"].dt.weekday  # Monday=0
+    df["Label"] = df["Park"] + " (" + df["split_part"].astype(str) + ") " + df["Estimated Hours"].astype(str) + "h"
+    if "Overtime" not in df:
+        df["Overtime"] = False
+    df["Overtime"] = df["Overtime"].astype(bool)
+    return df
+
+
+def _page_keys(df, page_by, teams_per_page):
+    """Page key of every job: its week, or its block of ``teams_per_page`` teams."""
+    if page_by == "week":
+        return df["Week"].to_numpy()
+    import pandas as pd
+
+    team_codes, _ = pd.factorize(df["Team"], sort=True)
+    return team_codes // teams_per_page
+
+
+def _build_pages(df, page_by, teams_per_page, team_colors, day_hours, labels=True):
+    """
+    Group jobs into pages in one pass.
+
+    Each page is a plain dict of arrays (rows, columns, bar geometry and
+    cell labels), cheap to send to a worker process.
+    """
+    import pandas as pd
+
+    df = df.assign(_page=_page_keys(df, page_by, teams_per_page))
+    df = df.sort_values(["_page", "Team", "Week", "Weekday", "Date"], kind="stable")
+    ncols = 7 if (df["Weekday"] == 6).any() else 6
+
+    pages = []
+    for page_key, page in df.groupby("_page", sort=True):
+        rows = page[["Team", "Week"]].drop_duplicates()
+        row_index = pd.MultiIndex.from_frame(rows).get_indexer(pd.MultiIndex.from_frame(page[["Team", "Week"]]))
+        cell = row_index * ncols + page["Weekday"].to_numpy()
+        hours = page["Estimated Hours"].to_numpy(dtype=float)
+        # Jobs follow each other through the day; bars start where the previous one ended
+        end = pd.Series(hours).groupby(cell).cumsum().to_numpy()
+
+        job_labels = page["Label"].tolist()
+        starts = np.flatnonzero(np.diff(cell, prepend=-1)).tolist()
+        bounds = list(zip(starts, starts[1:] + [len(cell)]))
+        lines_per_row = np.zeros(len(rows), dtype=int)
+        if labels:
+            np.maximum.at(lines_per_row, row_index[starts], [b - a for a, b in bounds])
+
+        if page_by == "week":
+            title = f"Week {page_key}"
+        else:
+            teams = rows["Team"].unique()
+            title = teams[0] if len(teams) == 1 else f"{teams[0]} – {teams[-1]}"
+        pages.append({
+            "key": f"week{int(page_key):02d}" if page_by == "week" else f"teams{int(page_key) + 1:02d}",
+            "title": title,
+            "ncols": ncols,
+            "row_labels": [f"{team}\nW{week}" if page_by == "team" else team
+                           for team, week in rows.itertuples(index=False)],
+            "row_heights": np.maximum(MIN_ROW_HEIGHT, BAR_HEIGHT + LINE_HEIGHT * lines_per_row + ROW_PADDING),
+            "job_row": row_index,
+            "job_col": page["Weekday"].to_numpy(),
+            "job_start": (end - hours) / day_hours,
+            "job_width": hours / day_hours,
+            "job_color": page["Team"].map(team_colors).to_numpy(),
+            "job_overtime": page["Overtime"].to_numpy(),
+            "cell_row": row_index[starts],
+            "cell_col": page["Weekday"].to_numpy()[starts],
+            "cell_text": ["\n".join(job_labels[a:b]) for a, b in bounds] if labels else [],
+        })
+    return pages
+
+
+def _render_page(page, out_file, dpi):
+    """Draw one page on a single axes; all job bars go into one collection."""
+    from matplotlib.collections import PolyCollection
+
+    plt = _pyplot()
+    ncols = page["ncols"]
+    heights = page["row_heights"]
+    tops = np.concatenate([[0.0], np.cumsum(heights)])  # y grows downwards, in inches
+    fig_width = LABEL_WIDTH + WIDTH_PER_DAY * ncols
+    fig_height = TITLE_HEIGHT + tops[-1]
+
+    fig = plt.figure(figsize=(fig_width, fig_height))
+    ax = fig.add_axes([LABEL_WIDTH / fig_width, 0, WIDTH_PER_DAY * ncols / fig_width, tops[-1] / fig_height])
+    ax.set_xlim(0, ncols)
+    ax.set_ylim(tops[-1], 0)
+
+    # Bars: x in day columns (a full day spans 0.05-0.95), y in inches
+    x0 = page["job_col"] + 0.05 + 0.9 * page["job_start"]
+    x1 = x0 + 0.9 * page["job_width"]
+    y0 = tops[page["job_row"]] + 0.05
+    y1 = y0 + BAR_HEIGHT
+    verts = np.stack([np.stack([x0, y0], 1), np.stack([x1, y0], 1), np.stack([x1, y1], 1), np.stack([x0, y1], 1)], 1)
+    ax.add_collection(PolyCollection(
+        verts,
+        facecolors=list(page["job_color"]),
+        edgecolors=np.where(page["job_overtime"], "red", "black"),
+        linewidths=0.5,
+    ))
+
+    for row, col, text in zip(page["cell_row"].tolist(), page["cell_col"].tolist(), page["cell_text"]):
+        ax.text(col + 0.05, tops[row] + 0.08 + BAR_HEIGHT, text, ha="left", va="top", fontsize=6)
+
+    ax.hlines(tops[1:-1], 0, ncols, colors="grey", linewidths=0.5)
+    ax.vlines(np.arange(1, ncols), 0, tops[-1], colors="grey", linewidths=0.5)
+    ax.set_xticks(np.arange(ncols) + 0.5)
+    ax.set_xticklabels(WEEKDAYS[:ncols])
+    ax.xaxis.tick_top()
+    ax.set_yticks((tops[:-1] + tops[1:]) / 2)
+    ax.set_yticklabels(page["row_labels"], fontsize=8)
+    ax.tick_params(length=0)
+    fig.suptitle(f"Calendar-style Gantt Chart: {page['title']}", fontsize=14, y=1 - 0.25 / fig_height)
+
+    fig.savefig(out_file, dpi=dpi)
+    plt.close(fig)
+    return out_file
+
+
+def export_gantt_chart(df, filename="mowing_team_schedule.xlsx", calendar=None, page_by="week",
+                       teams_per_page=10, fmt="png", dpi=150, workers=1, labels=True):
+    """
+    Render the schedule as calendar-style Gantt pages.
+
+    Every row of a page is one team in one week, with a column per weekday;
+    each job is a bar sized by its hours, outlined red when it is overtime.
+    Pages are written next to ``filename`` as
+    ``<stem>.calendar_gantt_<page>.<fmt>``.
+
+    Args:
+        page_by (str): "week" for one page per week with every team, or
+            "team" for one page per block of ``teams_per_page`` teams with
+            every week.
+        fmt (str): "png" or "svg".
+        dpi (int): Resolution of PNG pages.
+        workers (int): Render pages in this many processes.
+        labels (bool): List each cell's jobs under its bars. Text dominates
+            rendering time, so turning this off gives much faster (and
+            more compact) overview pages for long schedules.
+
+    Returns:
+        list: Paths of the written pages.
+    """
+    if page_by not in PAGE_MODES:
+        raise ValueError(f"Unknown page mode {page_by!r}; expected one of {PAGE_MODES}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    if df.empty:
+        print("No data to generate calendar Gantt chart.")
+        return []
+    df = _prepare(df, calendar)
     if df.empty:
         print("No valid data after parsing.")
-        return
-
-    df["Week"] = df["Date"].dt.isocalendar().week
-    df["Weekday"] = df["Date"].dt.weekday  # Monday=0
-    df["Label"] = df["Park"] + " (" + df["split_part"].astype(str) + ")"
+        return []
 
     teams = sorted(df["Team"].unique())
-    weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
-
-    team_color_map = {team: plt.cm.tab20(i % 20) for i, team in enumerate(teams)}
-
-    spacing = 0.15  # vertical space per job label
-    min_row_height = 1.5  # increased min row height for better spacing
-    padding = 0.5  # padding in inches per row
-
-    width_per_day = 3  # width in inches per weekday column
-
-    # Calculate max jobs stacked per day for each team (for row height)
-    team_row_heights = []
-    for team in teams:
-        team_df = df[df["Team"] == team]
-        max_jobs = 0
-        for day in range(len(weekdays)):
-            n_jobs = len(team_df[team_df["Weekday"] == day])
-            if n_jobs > max_jobs:
-                max_jobs = n_jobs
-        row_height = max(min_row_height, spacing * max_jobs + padding)
-        team_row_heights.append(row_height)
-
-    # Columns have fixed equal widths here
-    col_widths = [width_per_day] * len(weekdays)
-
-    total_height = sum(team_row_heights)
-    total_width = sum(col_widths)
-
-    # Set minimum figure size to avoid zero-size layout issues
-    min_fig_width = 8
-    min_fig_height = 10
-    fig_width = max(total_width, min_fig_width)
-    fig_height = max(total_height, min_fig_height)
-
-    fig = plt.figure(figsize=(fig_width, fig_height), constrained_layout=True)
-    gs = gridspec.GridSpec(
-        nrows=len(teams),
-        ncols=len(weekdays),
-        height_ratios=team_row_heights,
-        width_ratios=col_widths,
-        figure=fig,
-    )
-
-    for i, team in enumerate(teams):
-        team_df = df[df["Team"] == team]
-        for j, day in enumerate(range(len(weekdays))):
-            ax = fig.add_subplot(gs[i, j])
-            day_jobs = team_df[team_df["Weekday"] == day]
-            items = day_jobs.sort_values("Date")
-
-            n_jobs = len(items)
-            y_start = min(0.95, spacing * n_jobs + 0.05)
-            y = y_start
-
-            for _, row in items.iterrows():
-                edge_color = "red" if row.get("Overtime", False) else "black"
-                ax.text(
-                    0.5,
-                    y,
-                    f"{row['Label']}\n{row['Estimated Hours']}h",
-                    ha='center',
-                    va='top',
-                    fontsize=8,
-                    color="black",
-                    bbox=dict(
-                        boxstyle="round,pad=0.2",
-                        facecolor=team_color_map[team],
-                        edgecolor=edge_color,
-                    ),
-                )
-                y -= spacing
-
-            ax.set_xticks([])
-            ax.set_yticks([])
-            if i == 0:
-                ax.set_title(weekdays[j])
-            if j == 0:
-                ax.set_ylabel(team, rotation=0, ha='right', va='center', fontsize=8)
-
-    plt.suptitle("Calendar-style Gantt Chart (by Team and Day)", fontsize=14)
-
-    # Fallback: try tight_layout to avoid layout issues
-    try:
-        plt.tight_layout()
-    except Exception:
-        pass
-
-    out_file = Path(filename).with_suffix('.calendar_gantt.png')
-    plt.savefig(out_file, dpi=150)
-    plt.close()
-    print(f"✅ Calendar-style Gantt chart saved to: {out_file}")
+    tab20 = _pyplot().cm.tab20
+    team_colors = {team: tab20(i % 20) for i, team in enumerate(teams)}
+    day_hours = max(df.groupby(["Team", "Date"])["Estimated Hours"].sum().max(), 1e-9)
+    pages = _build_pages(df, page_by, teams_per_page, team_colors, day_hours, labels)
+
+    out = Path(filename)
+    out_files = [out.with_name(f"{out.stem}.calendar_gantt_{page['key']}.{fmt}") for page in pages]
+    if workers > 1 and len(pages) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render_page, pages, out_files, [dpi] * len(pages)))
+    else:
+        for page, out_file in zip(pages, out_files):
+            _render_page(page, out_file, dpi)
+
+    print(f"✅ Calendar-style Gantt chart saved to {len(out_files)} page(s): {out_files[0]}"
+          f"{' ...' if len(out_files) > 1 else ''}")
+    return out_files
@@ -0,0 +1,147 @@
+import json
+import logging
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from park_loader import ParkTable
+from scheduler import MowingScheduler
+from utils import WorkingCalendar
+
+DIFF_KEYS = ["Team", "Date", "Park", "Estimated Hours"]
+
+
+def load_delta(delta_path):
+    """
+    Load a schedule change description from JSON.
+
+    Recognised keys (all optional):
+        FROM_DATE: first date new parks may be placed on (default: the start date)
+        BAD_WEATHER_DAYS / PUBLIC_HOLIDAYS: extra dates that can no longer be worked
+        ADD_PARKS: park records to add (name, area_sqm, suburb[, priority])
+        REMOVE_PARKS: names of parks to drop
+        TEAM_UNAVAILABLE_FROM: team name -> first date the team can no longer work
+    """
+    with open(delta_path) as f:
+        return parse_delta(json.load(f))
+
+
+def parse_delta(delta):
+    """Parse a change description already read from JSON (see ``load_delta``)."""
+    delta = dict(delta)
+    if delta.get("FROM_DATE"):
+        delta["FROM_DATE"] = date.fromisoformat(delta["FROM_DATE"])
+    delta["SKIPPED_DATES"] = {
+        date.fromisoformat(d) for d in delta.get("BAD_WEATHER_DAYS", []) + delta.get("PUBLIC_HOLIDAYS", [])
+    }
+    delta["ADD_PARKS"] = delta.get("ADD_PARKS", [])
+    delta["REMOVE_PARKS"] = set(delta.get("REMOVE_PARKS", []))
+    delta["TEAM_UNAVAILABLE_FROM"] = {
+        team: date.fromisoformat(d) for team, d in delta.get("TEAM_UNAVAILABLE_FROM", {}).items()
+    }
+    return delta
+
+
+def apply_delta(config, parks, delta):
+    """Return copies of ``config`` and ``parks`` with ``delta`` applied."""
+    config = dict(config)
+    config["SKIPPED_DATES"] = config["SKIPPED_DATES"] | delta["SKIPPED_DATES"]
+    config["TEAM_UNAVAILABLE_FROM"] = {**config.get("TEAM_UNAVAILABLE_FROM", {}), **delta["TEAM_UNAVAILABLE_FROM"]}
+    parks = ParkTable.coerce(parks)
+    keep = np.flatnonzero(~np.isin(parks.name, list(delta["REMOVE_PARKS"])))
+    parks = ParkTable.concat([parks.take(keep), ParkTable.from_records(delta["ADD_PARKS"])])
+    return config, parks
+
+
+def earliest_affected_date(config, saved_jobs, delta):
+    """
+    First date whose work may change, or None if the delta changes nothing.
+
+    Skipped dates only count if they were working days. New parks affect
+    the schedule from FROM_DATE, or from its first day without one; a
+    FROM_DATE on its own changes nothing.
+    """
+    dates = []
+    calendar = WorkingCalendar(config["START_DATE"], config["SKIPPED_DATES"], config["DEFAULT_WORKDAYS_PER_WEEK"],
+                               config.get("NON_WORKING_WEEKDAYS", (6,)))
+    dates.extend(d for d in delta["SKIPPED_DATES"] if calendar.get_day(d))
+    dates.extend(delta["TEAM_UNAVAILABLE_FROM"].values())
+    removed = saved_jobs[saved_jobs["Park"].isin(delta["REMOVE_PARKS"])]
+    if not removed.empty:
+        dates.append(date.fromisoformat(removed["Date"].min()))
+    if delta["ADD_PARKS"]:
+        dates.append(delta.get("FROM_DATE") or config["START_DATE"])
+    return min(dates) if dates else None
+
+
+def diff_jobs(old_jobs, new_jobs):
+    """
+    Rows that differ between two job tables, matched on team, date, park
+    and hours, with a leading ``Change`` column of "removed" or "added".
+    """
+    def unmatched(jobs, other):
+        keys = jobs[DIFF_KEYS].assign(_row=range(len(jobs)))
+        merged = keys.merge(other[DIFF_KEYS].drop_duplicates(), on=DIFF_KEYS, how="left", indicator=True)
+        return jobs.iloc[merged.loc[merged["_merge"] == "left_only", "_row"].to_numpy()]
+
+    changed = pd.concat([
+        unmatched(old_jobs, new_jobs).assign(Change="removed"),
+        unmatched(new_jobs, old_jobs).assign(Change="added"),
+    ])
+    columns = ["Change"] + [c for c in new_jobs.columns if c in changed]
+    return changed[columns].sort_values(["Date", "Team", "Park", "Change"]).reset_index(drop=True)
+
+
+def reschedule(config, parks, saved_jobs, delta, engine="greedy", completed_jobs=None):
+    """
+    Re-plan a saved schedule after a change, keeping committed work.
+
+    Jobs dated before the earliest affected date are frozen, as are
+    ``completed_jobs`` whatever their date; everything else from that date on
+    is planned again around them with the delta applied.
+
+    Args:
+        config (dict): Configuration from ``load_config``.
+        parks (ParkTable | list): Parks the saved schedule was built from.
+        saved_jobs (DataFrame): Saved job table (``export_jobs_to_df`` format).
+        delta (dict): Change description from ``load_delta``.
+        engine (str): Assignment engine to use.
+        completed_jobs (DataFrame, optional): Rows of ``saved_jobs`` already
+            done, kept on their team and date. Those on dates the delta
+            skips book no capacity; they are returned with the working day
+            that follows.
+
+    Returns:
+        tuple: (scheduler, new job table, diff of changed jobs)
+    """
+    cutoff = earliest_affected_date(config, saved_jobs, delta)
+    config, parks = apply_delta(config, parks, delta)
+    scheduler = MowingScheduler(config, parks)
+    if cutoff is None:
+        logging.info("Delta does not change the schedule")
+        # The saved jobs stand as they are; book them so the scheduler's
+        # job table and ledger describe the schedule that is returned
+        scheduler.ledger = scheduler._new_ledger()
+        scheduler._book_frozen(saved_jobs)
+        return scheduler, saved_jobs, diff_jobs(saved_jobs.iloc[:0], saved_jobs.iloc[:0])
+
+    cutoff_iso = cutoff.isoformat()
+    frozen = saved_jobs[saved_jobs["Date"] < cutoff_iso]
+    if completed_jobs is not None:
+        frozen = pd.concat([frozen, completed_jobs[completed_jobs["Date"] >= cutoff_iso]])
+    frozen = frozen[~frozen["Park"].isin(delta["REMOVE_PARKS"])]
+    start_day = scheduler.day_tracker.calendar.get_next_day(cutoff)
+    logging.info(f"Re-planning from {cutoff} (day {start_day}); {len(frozen)} committed jobs kept")
+    scheduler.assign_parks(engine=engine, frozen_jobs=frozen, start_day=start_day)
+    new_jobs = scheduler.export_jobs_to_df()
+    if completed_jobs is not None:
+        calendar = scheduler.day_tracker.calendar
+        skipped = frozen["Date"].map(lambda d: not calendar.get_day(date.fromisoformat(d)))
+        if skipped.any():
+            done = frozen[skipped.to_numpy()].copy()
+            done["Day"] = [calendar.get_next_day(date.fromisoformat(d)) for d in done["Date"]]
+            new_jobs = pd.concat([new_jobs, done]).sort_values(["Team", "Day"], kind="stable")
+
+    diff = diff_jobs(saved_jobs[saved_jobs["Date"] >= cutoff_iso], new_jobs[new_jobs["Date"] >= cutoff_iso])
+    return scheduler, new_jobs, diff
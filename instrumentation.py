@@ -0,0 +1,106 @@
+import cProfile
+import io
+import json
+import logging
+import pstats
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# Functions listed in the log after a --profile run
+PROFILE_TOP = 25
+
+
+class Instrumentation:
+    """
+    Per-stage wall/CPU timers and hot-path counters for one run.
+
+    ``stage`` times a block of the pipeline. Schedulers passed to ``attach``
+    count events in their assignment loops into ``counters`` (see
+    ``MowingScheduler.counters``); the report adds the chunks per job and
+    the calendar lookups of those schedulers.
+
+    When ``enabled`` is False, ``stage`` is a no-op and schedulers are left
+    unattached, so their loops skip the bookkeeping.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = []
+        self.counters = Counter()
+        self.schedulers = []
+        self._start = (time.perf_counter(), time.process_time())
+
+    def stage(self, name):
+        """Context manager timing the pipeline stage ``name``."""
+        return self._timed(name) if self.enabled else nullcontext()
+
+    @contextmanager
+    def _timed(self, name):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.stages.append({
+                "stage": name,
+                "wall_s": round(time.perf_counter() - wall, 4),
+                "cpu_s": round(time.process_time() - cpu, 4),
+            })
+
+    def attach(self, scheduler):
+        """Let ``scheduler`` count into this run's counters; returns it."""
+        if self.enabled:
+            scheduler.counters = self.counters
+            self.schedulers.append(scheduler)
+        return scheduler
+
+    @staticmethod
+    def chunks_per_job(scheduler):
+        """Chunks (one team-day of work each) per job of a scheduler's job table."""
+        cols = scheduler.jobs.columns()
+        if not len(cols["park"]):
+            return {"jobs": 0, "chunks": 0, "mean": 0.0, "max": 0, "histogram": {}}
+        _, counts = np.unique(np.column_stack([cols["park"], cols["job_number"]]), axis=0, return_counts=True)
+        sizes, jobs = np.unique(np.minimum(counts, 5), return_counts=True)
+        return {
+            "jobs": int(len(counts)),
+            "chunks": int(counts.sum()),
+            "mean": round(float(counts.mean()), 3),
+            "max": int(counts.max()),
+            "histogram": {("5+" if s == 5 else str(s)): int(j) for s, j in zip(sizes.tolist(), jobs.tolist())},
+        }
+
+    def report(self):
+        """The run's timings and counters as a JSON-ready dict."""
+        counters = dict(self.counters)
+        # Worker processes report their lookups through the counters
+        counters["date_lookups"] = counters.get("date_lookups", 0) + sum(
+            s.day_tracker.calendar.lookups for s in self.schedulers)
+        return {
+            "total_wall_s": round(time.perf_counter() - self._start[0], 4),
+            "total_cpu_s": round(time.process_time() - self._start[1], 4),
+            "stages": self.stages,
+            "counters": counters,
+            "chunks_per_job": [self.chunks_per_job(s) for s in self.schedulers],
+        }
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+def profiled(func, path, *args, **kwargs):
+    """
+    Run ``func`` under cProfile, save the stats to ``path`` (readable with
+    ``pstats`` or snakeviz) and log the functions with the most cumulative time.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        logging.info(f"Profile saved to {path}\n{out.getvalue()}")
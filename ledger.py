@@ -0,0 +1,188 @@
+from array import array
+
+import numpy as np
+
+
+class CapacityLedger:
+    """
+    Array-backed record of how much work each team has booked.
+
+    Teams are addressed by index (their position in ``teams``). Booked hours
+    are kept in a team x day matrix and a team x week matrix that grow on
+    demand, so capacity questions over many teams and days can be answered
+    with vectorized queries instead of per-team dict lookups.
+
+    Args:
+        teams (list): Team names, in index order.
+        max_daily_hours (float): Hours a team may work on one day (incl. overtime).
+        weekly_limits (dict): Weekly hour cap per team name (unlimited if absent).
+        historical_hours (dict): Hours already worked per team name.
+        workdays_per_week (int): Working days per week, for day -> week mapping.
+    """
+
+    def __init__(self, teams, max_daily_hours, weekly_limits, historical_hours, workdays_per_week,
+                 initial_days=64):
+        self.teams = list(teams)
+        self.index = {t: i for i, t in enumerate(self.teams)}
+        n = len(self.teams)
+        self.max_daily_hours = max_daily_hours
+        self.workdays_per_week = workdays_per_week
+        self.weekly_limits = np.array([weekly_limits.get(t, np.inf) for t in self.teams], dtype=float)
+        self.current_day = np.ones(n, dtype=np.int64)
+        self.total_hours = np.array([historical_hours.get(t, 0) for t in self.teams], dtype=float)
+        self.park_counts = np.zeros(n, dtype=np.int64)
+        self.day_hours = np.zeros((n, initial_days + 1))
+        self.week_hours = np.zeros((n, self.get_week(initial_days) + 1))
+        self.last_available_day = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+        self._team_parks = set()
+        self.last_day = 0
+
+    def get_week(self, day):
+        return ((day - 1) // self.workdays_per_week) + 1
+
+    def _ensure_day(self, day):
+        if day >= self.day_hours.shape[1]:
+            cols = max(day + 1, 2 * self.day_hours.shape[1])
+            self.day_hours = np.pad(self.day_hours, ((0, 0), (0, cols - self.day_hours.shape[1])))
+        week = self.get_week(day)
+        if week >= self.week_hours.shape[1]:
+            cols = max(week + 1, 2 * self.week_hours.shape[1])
+            self.week_hours = np.pad(self.week_hours, ((0, 0), (0, cols - self.week_hours.shape[1])))
+
+    def hours_on(self, team, day):
+        return float(self.day_hours[team, day]) if day < self.day_hours.shape[1] else 0.0
+
+    def hours_today(self, team):
+        return self.hours_on(team, self.current_day[team])
+
+    def available_hours(self, team, week):
+        """Hours ``team`` can still take on its current day, or <= 0 if it is full."""
+        if self.current_day[team] > self.last_available_day[team]:
+            return 0.0
+        remaining = round(self.max_daily_hours - self.hours_today(team), 2)
+        if remaining <= 0:
+            return remaining
+        week_hours = float(self.week_hours[team, week]) if week < self.week_hours.shape[1] else 0.0
+        return min(remaining, round(float(self.weekly_limits[team]) - week_hours, 2))
+
+    def book(self, team, park_name, hours, day=None):
+        """Book ``hours`` of ``park_name`` on ``day`` (default: the team's current day)."""
+        day = int(self.current_day[team]) if day is None else day
+        self._ensure_day(day)
+        self.day_hours[team, day] += hours
+        self.week_hours[team, self.get_week(day)] += hours
+        self.total_hours[team] += hours
+        self.last_day = max(self.last_day, day)
+        if (team, park_name) not in self._team_parks:
+            self._team_parks.add((team, park_name))
+            self.park_counts[team] += 1
+
+    def advance(self, teams, days=1):
+        """Move ``teams`` (an index array without duplicates) forward by ``days``."""
+        self.current_day[teams] += days
+
+    def absorb(self, other):
+        """Copy the state of every team in ``other`` (a ledger over a subset of these teams)."""
+        if not other.teams:
+            return
+        rows = np.array([self.index[t] for t in other.teams])
+        self._ensure_day(other.day_hours.shape[1] - 1)
+        if other.week_hours.shape[1] > self.week_hours.shape[1]:
+            self.week_hours = np.pad(self.week_hours, ((0, 0), (0, other.week_hours.shape[1] - self.week_hours.shape[1])))
+        self.last_day = max(self.last_day, other.last_day)
+        self.current_day[rows] = other.current_day
+        self.last_available_day[rows] = other.last_available_day
+        self.total_hours[rows] = other.total_hours
+        self.park_counts[rows] = other.park_counts
+        self.day_hours[rows, :other.day_hours.shape[1]] = other.day_hours
+        self.week_hours[rows, :other.week_hours.shape[1]] = other.week_hours
+        self._team_parks.update((int(rows[t]), name) for t, name in other._team_parks)
+
+    def free_hours(self, teams, days):
+        """
+        Free hours of each of ``teams`` on each of ``days`` as a len(teams) x
+        len(days) matrix. Days before a team's current day are in its past,
+        and days after its last available day are off; neither has free hours.
+        """
+        teams = np.asarray(teams)
+        days = np.asarray(days)
+        self._ensure_day(int(days.max()))
+        booked_day = self.day_hours[np.ix_(teams, days)]
+        booked_week = self.week_hours[np.ix_(teams, self.get_week(days))]
+        # Bookings are in hundredths of an hour; rounding drops the float
+        # noise that would otherwise leave slivers of free time
+        free = np.round(np.minimum(self.max_daily_hours - booked_day,
+                                   self.weekly_limits[teams, None] - booked_week), 2)
+        free[days[None, :] < self.current_day[teams, None]] = 0.0
+        free[days[None, :] > self.last_available_day[teams, None]] = 0.0
+        return free
+
+    def earliest_day_with_capacity(self, teams, from_day, hours=0.0):
+        """
+        First day on or after ``from_day`` on which any of ``teams`` has at
+        least ``hours`` free (any positive amount when ``hours`` is 0), or
+        None if that never happens.
+        """
+        teams = np.asarray(teams)
+        if len(teams) == 0:
+            return None
+        # Past the last booked day plus one week nothing is booked, so
+        # capacity there is constant and the window can stop.
+        horizon = max(from_day, int(self.current_day[teams].max()), self.last_day) + self.workdays_per_week
+        horizon = min(horizon, int(self.last_available_day[teams].max()))
+        if horizon < from_day:
+            return None
+        days = np.arange(from_day, horizon + 1)
+        free = self.free_hours(teams, days)
+        fits = (free >= hours) if hours > 0 else (free > 0)
+        hit = fits.any(axis=0)
+        if not hit.any():
+            return None
+        return int(days[hit.argmax()])
+
+
+class JobTable:
+    """
+    Columnar store of scheduled job chunks.
+
+    Each column is a typed ``array`` so millions of chunks stay compact;
+    ``columns`` returns NumPy copies for building DataFrames.
+    """
+
+    COLUMNS = {
+        "team": "q",
+        "day": "q",
+        "park": "q",
+        "job_number": "q",
+        "split_part": "q",
+        "area_sqm": "d",
+        "estimated_hours": "d",
+        "overtime": "b",
+    }
+
+    def __init__(self):
+        for name, typecode in self.COLUMNS.items():
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.team)
+
+    def append(self, team, day, park, job_number, split_part, area_sqm, estimated_hours, overtime):
+        self.team.append(team)
+        self.day.append(day)
+        self.park.append(park)
+        self.job_number.append(job_number)
+        self.split_part.append(split_part)
+        self.area_sqm.append(area_sqm)
+        self.estimated_hours.append(estimated_hours)
+        self.overtime.append(overtime)
+
+    def extend(self, columns):
+        """Append rows given as a dict of equal-length NumPy columns (see ``columns``)."""
+        for name in self.COLUMNS:
+            getattr(self, name).extend(np.asarray(columns[name]).tolist())
+
+    def columns(self):
+        cols = {name: np.array(getattr(self, name)) for name in self.COLUMNS}
+        cols["overtime"] = cols["overtime"].astype(bool)
+        return cols
@@ -0,0 +1,341 @@
+import logging
+import math
+import random
+import time
+
+from dependencies import DependencyGraph
+from ledger import JobTable
+
+# Cost of one extra job chunk, one day of makespan, one hour of standard
+# deviation in team loads and one hour of overtime
+DEFAULT_WEIGHTS = {"splits": 1.0, "makespan": 5.0, "load_std": 1.0, "overtime": 1.0}
+# Iterations between checks of the time limit
+CLOCK_EVERY = 256
+# Cost changes smaller than this are not improvements
+EPSILON = 1e-9
+
+
+class LocalSearch:
+    """
+    Improve a finished schedule by moving and swapping job chunks.
+
+    A chunk is the work of one job (a mowing of a park) done by one team on
+    one day. Two operators are tried at random:
+
+    - move: put a chunk on another (team, day), merging it into the job's
+      chunk there if there is one;
+    - swap: exchange the (team, day) of two chunks of different jobs, again
+      merging where a chunk lands next to its own job.
+
+    Moves aim at a cell of a sibling chunk (to merge splits) about half of
+    the time and at a random allowed team and day otherwise. A candidate is
+    kept only if it lowers the cost: weighted extra chunks, makespan, standard
+    deviation of team hours and overtime hours. Running sums and per-day
+    chunk counts make evaluating a candidate constant time, so the search
+    never re-scores the whole schedule.
+
+    Every candidate respects the daily hours (with overtime if allowed),
+    weekly hour limits, each team's last available day and the suburb's
+    team groups. Jobs with dependencies or repeat mowings stay within the
+    days they spanned, so no prerequisite finishes later and no repeat
+    mowing becomes due later; other jobs may use any day up to the
+    makespan.
+
+    Args:
+        scheduler (MowingScheduler): A scheduler after ``assign_parks``.
+        weights (dict, optional): Overrides for ``DEFAULT_WEIGHTS``.
+        seed (int): Seed of the random choices; equal seeds give equal results
+            for the same number of iterations.
+    """
+
+    def __init__(self, scheduler, weights=None, seed=0):
+        self.scheduler = scheduler
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.rng = random.Random(seed)
+        config = scheduler.config
+        ledger = scheduler.ledger
+        self.workday_hours = config["DEFAULT_WORKDAY_HOURS"]
+        self.max_daily = ledger.max_daily_hours
+        self.weekly_limits = ledger.weekly_limits.tolist()
+        self.last_available = ledger.last_available_day.tolist()
+        self.workdays_per_week = ledger.workdays_per_week
+        self.iterations = 0
+        self.accepted = 0
+
+        cols = scheduler.jobs.columns()
+        parks = scheduler.parks
+        graph = DependencyGraph(parks.name.tolist(), config["DEPENDENCIES"])
+        recurrence = scheduler._recurrence_days()
+        pinned = [bool(graph.successors[i] or graph.predecessors[i] or recurrence[i]) for i in range(len(parks))]
+        suburbs = parks.suburb.tolist()
+        allowed_by_suburb = {}
+
+        # Chunks as parallel lists; merged chunks are dropped from `alive`
+        self.team = cols["team"].tolist()
+        self.day = cols["day"].tolist()
+        self.hours = cols["estimated_hours"].tolist()
+        self.area = cols["area_sqm"].tolist()
+        self.makespan = max(self.day, default=0)
+        job_index = {}
+        self.job_key = []
+        self.job_of = []
+        self.job_chunks = []
+        for c, key in enumerate(zip(cols["park"].tolist(), cols["job_number"].tolist())):
+            j = job_index.get(key)
+            if j is None:
+                j = job_index[key] = len(self.job_key)
+                self.job_key.append(key)
+                self.job_chunks.append([])
+            self.job_of.append(j)
+            self.job_chunks[j].append(c)
+
+        # Teams and days each job may use
+        self.job_teams = []
+        self.job_window = []
+        for j, (park, _) in enumerate(self.job_key):
+            suburb = suburbs[park]
+            if suburb not in allowed_by_suburb:
+                allowed_by_suburb[suburb] = scheduler.allowed_teams(suburb)[1].tolist()
+            self.job_teams.append(allowed_by_suburb[suburb])
+            days = [self.day[c] for c in self.job_chunks[j]]
+            self.job_window.append((min(days), max(days)) if pinned[park] else (1, self.makespan))
+
+        self.cell = {}        # (job, team, day) -> chunk
+        self.cell_chunks = {}  # (team, day) -> chunks
+        self.day_hours = {}
+        self.week_hours = {}
+        self.day_count = [0] * (self.makespan + 1)
+        self.alive = list(range(len(self.team)))
+        self.position = list(range(len(self.team)))
+        for c in self.alive:
+            t, d, h = self.team[c], self.day[c], self.hours[c]
+            self.cell[(self.job_of[c], t, d)] = c
+            self.cell_chunks.setdefault((t, d), []).append(c)
+            self.day_hours[(t, d)] = self.day_hours.get((t, d), 0.0) + h
+            w = self.get_week(d)
+            self.week_hours[(t, w)] = self.week_hours.get((t, w), 0.0) + h
+            self.day_count[d] += 1
+        self.total_hours = ledger.total_hours.tolist()
+        self.load_sum = sum(self.total_hours)
+        self.load_squares = sum(h * h for h in self.total_hours)
+        self.overtime = sum(max(0.0, h - self.workday_hours) for h in self.day_hours.values())
+
+    def get_week(self, day):
+        return ((day - 1) // self.workdays_per_week) + 1
+
+    def load_std(self, load_sum=None, load_squares=None):
+        n = len(self.total_hours)
+        if not n:
+            return 0.0
+        load_sum = self.load_sum if load_sum is None else load_sum
+        load_squares = self.load_squares if load_squares is None else load_squares
+        return math.sqrt(max(0.0, load_squares / n - (load_sum / n) ** 2))
+
+    def cost(self):
+        w = self.weights
+        return (w["splits"] * (len(self.alive) - len(self.job_key)) + w["makespan"] * self.makespan
+                + w["load_std"] * self.load_std() + w["overtime"] * self.overtime)
+
+    def stats(self):
+        """Extra chunks, makespan, team load standard deviation and overtime hours."""
+        return {
+            "splits": len(self.alive) - len(self.job_key),
+            "makespan": self.makespan,
+            "load_std": round(self.load_std(), 2),
+            "overtime": round(self.overtime, 2),
+        }
+
+    def _fits(self, chunk, team, day):
+        """Whether ``chunk``'s job may be done by ``team`` on ``day``."""
+        j = self.job_of[chunk]
+        low, high = self.job_window[j]
+        return low <= day <= high and day <= self.last_available[team] and team in self.job_teams[j]
+
+    def _delta(self, placements):
+        """
+        Cost change of putting each chunk of ``placements`` (``[(chunk, team,
+        day)]``, at most two) on its new cell, or None if that breaks a limit.
+        """
+        cells, weeks, loads, counts = {}, {}, {}, {}
+        merges = 0
+        moving = {c for c, _, _ in placements}
+        for c, t, d in placements:
+            h, t0, d0 = self.hours[c], self.team[c], self.day[c]
+            cells[(t0, d0)] = cells.get((t0, d0), 0.0) - h
+            cells[(t, d)] = cells.get((t, d), 0.0) + h
+            w0, w = (t0, self.get_week(d0)), (t, self.get_week(d))
+            weeks[w0] = weeks.get(w0, 0.0) - h
+            weeks[w] = weeks.get(w, 0.0) + h
+            loads[t0] = loads.get(t0, 0.0) - h
+            loads[t] = loads.get(t, 0.0) + h
+            counts[d0] = counts.get(d0, 0) - 1
+            target = self.cell.get((self.job_of[c], t, d))
+            if target is not None and target not in moving:
+                merges += 1
+            else:
+                counts[d] = counts.get(d, 0) + 1
+
+        overtime = 0.0
+        for key, change in cells.items():
+            before = self.day_hours.get(key, 0.0)
+            after = before + change
+            if change > EPSILON and after > self.max_daily + EPSILON:
+                return None
+            overtime += max(0.0, after - self.workday_hours) - max(0.0, before - self.workday_hours)
+        for (t, w), change in weeks.items():
+            if change > EPSILON and self.week_hours.get((t, w), 0.0) + change > self.weekly_limits[t] + EPSILON:
+                return None
+        squares = self.load_squares
+        for t, change in loads.items():
+            squares += (self.total_hours[t] + change) ** 2 - self.total_hours[t] ** 2
+
+        makespan = self.makespan
+        if self.day_count[makespan] + counts.get(makespan, 0) == 0:
+            makespan -= 1
+            while makespan > 0 and self.day_count[makespan] + counts.get(makespan, 0) == 0:
+                makespan -= 1
+
+        w = self.weights
+        delta = (-w["splits"] * merges + w["makespan"] * (makespan - self.makespan)
+                 + w["load_std"] * (self.load_std(self.load_sum, squares) - self.load_std())
+                 + w["overtime"] * overtime)
+        return delta
+
+    def _detach(self, c):
+        t, d, h = self.team[c], self.day[c], self.hours[c]
+        del self.cell[(self.job_of[c], t, d)]
+        self.cell_chunks[(t, d)].remove(c)
+        self.day_hours[(t, d)] -= h
+        self.week_hours[(t, self.get_week(d))] -= h
+        self.total_hours[t] -= h
+        self.load_squares += self.total_hours[t] ** 2 - (self.total_hours[t] + h) ** 2
+        self.overtime -= max(0.0, self.day_hours[(t, d)] + h - self.workday_hours) - max(0.0, self.day_hours[(t, d)] - self.workday_hours)
+        self.day_count[d] -= 1
+
+    def _attach(self, c, t, d):
+        h = self.hours[c]
+        before = self.day_hours.get((t, d), 0.0)
+        self.team[c], self.day[c] = t, d
+        self.day_hours[(t, d)] = before + h
+        w = (t, self.get_week(d))
+        self.week_hours[w] = self.week_hours.get(w, 0.0) + h
+        self.total_hours[t] += h
+        self.load_squares += self.total_hours[t] ** 2 - (self.total_hours[t] - h) ** 2
+        self.overtime += max(0.0, before + h - self.workday_hours) - max(0.0, before - self.workday_hours)
+        target = self.cell.get((self.job_of[c], t, d))
+        if target is not None:
+            # Merge into the job's chunk already on this cell
+            self.hours[target] += h
+            self.area[target] += self.area[c]
+            self.job_chunks[self.job_of[c]].remove(c)
+            last = self.alive.pop()
+            if last != c:
+                self.alive[self.position[c]] = last
+                self.position[last] = self.position[c]
+            return
+        self.cell[(self.job_of[c], t, d)] = c
+        self.cell_chunks.setdefault((t, d), []).append(c)
+        self.day_count[d] += 1
+
+    def _apply(self, placements):
+        for c, _, _ in placements:
+            self._detach(c)
+        for c, t, d in placements:
+            self._attach(c, t, d)
+        while self.makespan > 0 and self.day_count[self.makespan] == 0:
+            self.makespan -= 1
+
+    def _candidates(self):
+        """Random move and swap placements for one chunk."""
+        rng = self.rng
+        c = self.alive[rng.randrange(len(self.alive))]
+        j = self.job_of[c]
+        siblings = self.job_chunks[j]
+        if len(siblings) > 1 and rng.random() < 0.5:
+            s = siblings[rng.randrange(len(siblings))]
+            if s == c:
+                return
+            t, d = self.team[s], self.day[s]
+        else:
+            low, high = self.job_window[j]
+            teams = self.job_teams[j]
+            t, d = teams[rng.randrange(len(teams))], rng.randint(low, high)
+            if (t, d) == (self.team[c], self.day[c]):
+                return
+        if not self._fits(c, t, d):
+            return
+        yield [(c, t, d)]
+        others = self.cell_chunks.get((t, d))
+        if others:
+            z = others[rng.randrange(len(others))]
+            if self.job_of[z] != j and self._fits(z, self.team[c], self.day[c]):
+                yield [(c, t, d), (z, self.team[c], self.day[c])]
+
+    def run(self, time_limit=1.0, max_iterations=None):
+        """
+        Search until ``time_limit`` seconds have passed or ``max_iterations``
+        candidates were drawn, whichever comes first (None: no limit; give
+        at least one).
+
+        Returns:
+            dict: ``stats`` before and after, with the iterations run and the
+            number of accepted changes.
+        """
+        if time_limit is None and max_iterations is None:
+            raise ValueError("Local search needs a time limit or an iteration limit")
+        before = self.stats()
+        deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        while self.alive and (max_iterations is None or self.iterations < max_iterations):
+            self.iterations += 1
+            if deadline is not None and self.iterations % CLOCK_EVERY == 0 and time.perf_counter() >= deadline:
+                break
+            for placements in self._candidates():
+                delta = self._delta(placements)
+                if delta is not None and delta < -EPSILON:
+                    self._apply(placements)
+                    self.accepted += 1
+                    break
+        after = self.stats()
+        logging.debug(f"Local search: {self.iterations} iterations, {self.accepted} changes kept")
+        return {"before": before, "after": after, "iterations": self.iterations, "accepted": self.accepted}
+
+    def write_back(self):
+        """
+        Replace the scheduler's jobs and ledger with the improved schedule.
+
+        Split parts are renumbered in day order within each job, and overtime
+        is flagged again for the hours past the workday in each team's day.
+        """
+        scheduler = self.scheduler
+        config = scheduler.config
+        old = scheduler.ledger
+        chunks = sorted(self.alive)  # original booking order
+        jobs = JobTable()
+        ledger = scheduler._new_ledger()
+        ledger.current_day[:] = old.current_day
+        parts = {}
+        split_parts = {}
+        booked = {}
+        names = scheduler.parks.name
+        for c in sorted(chunks, key=lambda c: (self.day[c], c)):
+            j = self.job_of[c]
+            split_parts[c] = parts[j] = parts.get(j, 0) + 1
+        for c in chunks:
+            park, job_number = self.job_key[self.job_of[c]]
+            t, d, h = self.team[c], self.day[c], self.hours[c]
+            done = booked.get((t, d), 0.0)
+            overtime = done + h > self.workday_hours + EPSILON if config["ALLOW_OVERTIME"] else False
+            booked[(t, d)] = done + h
+            jobs.append(t, d, park, job_number, split_parts[c], round(self.area[c], 2), round(h, 2), overtime)
+            ledger.book(t, names[park], h, d)
+        scheduler.jobs = jobs
+        scheduler.ledger = ledger
+        return jobs
+
+
+def improve_schedule(scheduler, time_limit=1.0, max_iterations=None, weights=None, seed=0):
+    """Run ``LocalSearch`` on a scheduled ``scheduler`` and keep the result; returns its summary."""
+    search = LocalSearch(scheduler, weights=weights, seed=seed)
+    result = search.run(time_limit, max_iterations)
+    search.write_back()
+    return result
@@ -1,17 +1,369 @@
-
-import pandas as pd
-from pathlib import Path
-import sys
+import csv
 import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+from utils import load_columns, save_columns
+
+REQUIRED_COLUMNS = ("name", "area_sqm", "suburb")
+INTEGER_COLUMNS = ("priority", "recurrence_days")
+COORDINATE_COLUMNS = ("lat", "lon")
+OPTIONAL_COLUMNS = INTEGER_COLUMNS + COORDINATE_COLUMNS
+NUMERIC_COLUMNS = ("area_sqm",) + OPTIONAL_COLUMNS
+CHUNK_ROWS = 100_000
+# CSV parsers: pandas (fast on big files) or the standard library csv module
+# (no pandas import, so quicker to start on small files)
+READERS = ("pandas", "csv")
+SIDECAR_SUFFIX = ".parks.npz"
+# Bump when the sidecar layout or validation rules change
+SIDECAR_VERSION = 3
+# Bad rows listed individually in the log before the rest are summarised
+MAX_REPORTED_ROWS = 20
+
+
+class ParkTable:
+    """
+    Compact columnar list of parks: one NumPy array per field.
+
+    The scheduler reads the columns directly. Indexing or iterating yields
+    plain park dicts, so code written against a list of park records keeps
+    working.
+
+    Args:
+        name (array): Park names.
+        area_sqm (array): Mowing area of each park in square metres.
+        suburb (array): Suburb of each park.
+        priority (array, optional): Scheduling priority (higher first, default 0).
+        recurrence_days (array, optional): Days between mowings of the park
+            (0, the default, falls back to RECURRENCE_DAYS_BY_PRIORITY).
+        lat (array, optional): Latitude in degrees (NaN when unknown).
+        lon (array, optional): Longitude in degrees (NaN when unknown).
+    """
+
+    COLUMNS = REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+
+    def __init__(self, name, area_sqm, suburb, priority=None, recurrence_days=None, lat=None, lon=None):
+        self.name = np.asarray(name, dtype=object)
+        self.area_sqm = np.asarray(area_sqm, dtype=float)
+        self.suburb = np.asarray(suburb, dtype=object)
+        self.priority = (np.zeros(len(self.name), dtype=np.int64) if priority is None
+                         else np.asarray(priority, dtype=np.int64))
+        self.recurrence_days = (np.zeros(len(self.name), dtype=np.int64) if recurrence_days is None
+                                else np.asarray(recurrence_days, dtype=np.int64))
+        self.lat = np.full(len(self.name), np.nan) if lat is None else np.asarray(lat, dtype=float)
+        self.lon = np.full(len(self.name), np.nan) if lon is None else np.asarray(lon, dtype=float)
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a table from park dicts (``name``, ``area_sqm``, ``suburb`` and any optional columns)."""
+        records = list(records)
+        return cls(
+            [r["name"] for r in records],
+            [r["area_sqm"] for r in records],
+            [r["suburb"] for r in records],
+            [r.get("priority", 0) for r in records],
+            [r.get("recurrence_days", 0) for r in records],
+            [r.get("lat", np.nan) for r in records],
+            [r.get("lon", np.nan) for r in records],
+        )
+
+    @classmethod
+    def coerce(cls, parks):
+        """Return ``parks`` as a ParkTable, converting a list of records if needed."""
+        return parks if isinstance(parks, cls) else cls.from_records(parks)
+
+    @classmethod
+    def concat(cls, tables):
+        tables = list(tables)
+        return cls(**{name: np.concatenate([getattr(t, name) for t in tables]) for name in cls.COLUMNS})
+
+    def columns(self):
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    def take(self, indices):
+        """Table of the parks at ``indices``, in that order."""
+        indices = np.asarray(indices, dtype=np.int64)
+        return ParkTable(**{name: getattr(self, name)[indices] for name in self.COLUMNS})
+
+    def __len__(self):
+        return len(self.name)
+
+    def __getitem__(self, i):
+        return {
+            "name": self.name[i],
+            "area_sqm": float(self.area_sqm[i]),
+            "suburb": self.suburb[i],
+            "priority": int(self.priority[i]),
+            "recurrence_days": int(self.recurrence_days[i]),
+            "lat": float(self.lat[i]),
+            "lon": float(self.lon[i]),
+        }
+
+    def has_coordinates(self):
+        """Whether any park has a location."""
+        return bool((np.isfinite(self.lat) & np.isfinite(self.lon)).any())
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _to_float(values):
+    """
+    Floats of a parsed column and a mask of its blank fields. Fields that
+    are not blank but cannot be parsed come out as NaN.
+    """
+    if values.dtype.kind == "f":
+        return values, np.isnan(values)
+    numbers = np.full(len(values), np.nan)
+    blank = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values.tolist()):
+        if value is None or value != value or (isinstance(value, str) and not value.strip()):
+            blank[i] = True
+            continue
+        try:
+            numbers[i] = float(value)
+        except (TypeError, ValueError):
+            pass
+    return numbers, blank
+
+
+def _validate_chunk(chunk, first_line):
+    """
+    Convert one parsed chunk (a dict of equal-length column arrays) to typed arrays.
+
+    Returns the typed columns of the valid rows and a list of
+    ``(line number, problem)`` for the rows that were dropped.
+    """
+    size = len(chunk["name"])
+    lines = np.arange(first_line, first_line + size)
+    problems = []
+    valid = np.ones(size, dtype=bool)
+
+    def row(i):
+        return {column: values[i].item() if isinstance(values[i], np.generic) else values[i]
+                for column, values in chunk.items()}
+
+    def reject(mask, message):
+        mask = mask & valid
+        problems.extend((int(line), f"{message} ({row(i)})") for i, line in zip(np.flatnonzero(mask), lines[mask]))
+        valid[mask] = False
+
+    name = chunk["name"]
+    suburb = chunk["suburb"]
+    area, _ = _to_float(chunk["area_sqm"])
+    reject(name == "", "missing name")
+    reject(suburb == "", "missing suburb")
+    reject(~np.isfinite(area), "invalid area_sqm")
+    integers = {}
+    for column in INTEGER_COLUMNS:
+        if column not in chunk:
+            continue
+        values, blank = _to_float(chunk[column])
+        values[blank] = 0
+        bad = ~np.isfinite(values) | (values != np.round(values))
+        if column == "recurrence_days":
+            bad |= values < 0
+        reject(bad, f"invalid {column}")
+        integers[column] = values
+    coordinates = {}
+    if all(column in chunk for column in COORDINATE_COLUMNS):
+        # Blank coordinates are allowed (the park is just not located), but
+        # a latitude needs its longitude and both must be in range
+        (lat, lat_blank), (lon, lon_blank) = (_to_float(chunk[c]) for c in COORDINATE_COLUMNS)
+        given = ~lat_blank | ~lon_blank
+        reject(given & ~((np.abs(lat) <= 90) & (np.abs(lon) <= 180)), "invalid lat/lon")
+        coordinates = {"lat": lat, "lon": lon}
+
+    columns = {
+        "name": name[valid],
+        "area_sqm": area[valid],
+        "suburb": suburb[valid],
+    }
+    columns.update({column: values[valid].astype(np.int64) for column, values in integers.items()})
+    columns.update({column: values[valid] for column, values in coordinates.items()})
+    return columns, problems
+
 
-def load_parks_from_csv(csv_path):
+def _read_chunks(path, columns, chunk_rows, typed):
+    import pandas as pd
+
+    dtype = {c: str for c in columns}
+    if typed:
+        dtype.update({c: "float64" for c in NUMERIC_COLUMNS if c in columns})
+    chunks = pd.read_csv(
+        path,
+        usecols=columns,
+        dtype=dtype,
+        keep_default_na=False,
+        na_values={c: [""] for c in NUMERIC_COLUMNS},
+        skip_blank_lines=False,
+        chunksize=chunk_rows,
+    )
+    for chunk in chunks:
+        yield {c: chunk[c].to_numpy() for c in columns}
+
+
+def _read_rows(path, columns, chunk_rows):
+    """Like ``_read_chunks`` with every field as a string, parsed by the csv module."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = csv.reader(f)
+        header = next(rows, [])
+        positions = [header.index(c) for c in columns]
+        width = max(positions) + 1
+        chunk = []
+        for fields in rows:
+            if len(fields) < width:
+                fields = fields + [""] * (width - len(fields))
+            chunk.append([fields[p] for p in positions])
+            if len(chunk) == chunk_rows:
+                yield _transpose(chunk, columns)
+                chunk = []
+        if chunk:
+            yield _transpose(chunk, columns)
+
+
+def _transpose(rows, columns):
+    return {c: np.array(values, dtype=object) for c, values in zip(columns, zip(*rows))}
+
+
+def _read_header(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def check_parks_csv(csv_path, chunk_rows=CHUNK_ROWS, reader="pandas"):
+    """
+    Parse and validate a parks CSV in chunks of ``chunk_rows`` rows.
+
+    Numeric columns are parsed as floats directly. If a value cannot be
+    parsed that way the file is read again with every field as a string, so
+    that a bad value only drops its own row. Line numbers assume one line
+    per record.
+
+    The ``csv`` reader parses with the standard library instead and never
+    imports pandas: slower on large files, but it skips pandas' start-up
+    cost, which dominates for small ones.
+
+    Args:
+        csv_path (str | Path): Parks CSV with ``name``, ``area_sqm`` and
+            ``suburb`` columns and optional ``priority``,
+            ``recurrence_days``, ``lat`` and ``lon`` columns.
+        chunk_rows (int): Rows parsed per chunk.
+        reader (str): CSV parser, one of ``READERS``.
+
+    Returns:
+        tuple: (ParkTable of the valid parks in file order, sorted list of
+        ``(line number, problem)`` for the rows that were dropped)
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If required columns are missing or ``reader`` is unknown.
+    """
+    if reader not in READERS:
+        raise ValueError(f"Unknown CSV reader {reader!r}; expected one of {READERS}")
     path = Path(csv_path)
     if not path.exists():
-        logging.error(f"CSV file not found: {csv_path}")
-        sys.exit(1)
-    df = pd.read_csv(path)
-    required_cols = {'name', 'area_sqm', 'suburb'}
-    if not required_cols.issubset(df.columns):
-        logging.error(f"CSV missing required columns: {required_cols}")
-        sys.exit(1)
-    return df.to_dict(orient='records')
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+    header = _read_header(path)
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"CSV missing required columns: {missing}")
+    wanted = [c for c in ParkTable.COLUMNS if c in header]
+    if sum(c in header for c in COORDINATE_COLUMNS) == 1:
+        logging.warning(f"{path.name} needs both lat and lon columns to locate parks; ignoring coordinates")
+        wanted = [c for c in wanted if c not in COORDINATE_COLUMNS]
+
+    for typed in ((True, False) if reader == "pandas" else (False,)):
+        tables = []
+        problems = []
+        first_line = 2  # line 1 is the header
+        chunks = _read_chunks(path, wanted, chunk_rows, typed) if reader == "pandas" else _read_rows(path, wanted, chunk_rows)
+        try:
+            for chunk in chunks:
+                columns, chunk_problems = _validate_chunk(chunk, first_line)
+                tables.append(ParkTable(**columns))
+                problems.extend(chunk_problems)
+                first_line += len(chunk["name"])
+        except ValueError:
+            if not typed:
+                raise
+            logging.debug(f"{path.name} has non-numeric values; checking it row by row")
+            continue
+        break
+
+    problems.sort()
+    return (ParkTable.concat(tables) if tables else ParkTable([], [], [])), problems
+
+
+def read_parks_csv(csv_path, chunk_rows=CHUNK_ROWS, strict=False, reader="pandas"):
+    """
+    Load a parks CSV with :func:`check_parks_csv`, logging the dropped rows
+    (the first ``MAX_REPORTED_ROWS`` individually).
+
+    Args:
+        strict (bool): Raise instead of dropping invalid rows.
+
+    Returns:
+        ParkTable: The valid parks in file order.
+
+    Raises:
+        ValueError: As :func:`check_parks_csv`, and (when ``strict``) if
+            any row is invalid.
+    """
+    parks, problems = check_parks_csv(csv_path, chunk_rows=chunk_rows, reader=reader)
+    if problems:
+        name = Path(csv_path).name
+        for line, message in problems[:MAX_REPORTED_ROWS]:
+            logging.warning(f"{name} line {line}: {message}")
+        if len(problems) > MAX_REPORTED_ROWS:
+            logging.warning(f"... and {len(problems) - MAX_REPORTED_ROWS} more invalid rows")
+        if strict:
+            raise ValueError(f"{len(problems)} invalid row(s) in {name}, first at line {problems[0][0]}")
+        logging.warning(f"Skipped {len(problems)} invalid row(s) in {name}")
+    return parks
+
+
+def sidecar_path(csv_path):
+    path = Path(csv_path)
+    return path.with_name(path.name + SIDECAR_SUFFIX)
+
+
+def _stamp(csv_path):
+    stat = os.stat(csv_path)
+    return np.array([stat.st_size, stat.st_mtime_ns, SIDECAR_VERSION], dtype=np.int64)
+
+
+def load_parks_from_csv(csv_path, sidecar=False, chunk_rows=CHUNK_ROWS, strict=False, reader="pandas"):
+    """
+    Load parks from CSV as a :class:`ParkTable`.
+
+    With ``sidecar`` set, the parsed table is also saved next to the CSV
+    (``<csv>.parks.npz``) and reloaded from there on later runs for as long
+    as the CSV's size and modification time are unchanged.
+
+    See :func:`read_parks_csv` for the remaining arguments and errors.
+    """
+    cached = sidecar_path(csv_path)
+    if sidecar and os.path.exists(csv_path):
+        try:
+            columns, _, extra = load_columns(cached)
+            if np.array_equal(extra.get("stamp"), _stamp(csv_path)):
+                logging.debug(f"Loaded parks from {cached}")
+                return ParkTable(**columns)
+        except FileNotFoundError:
+            pass
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable park sidecar {cached}: {e}")
+
+    parks = read_parks_csv(csv_path, chunk_rows=chunk_rows, strict=strict, reader=reader)
+    if sidecar:
+        tmp = cached.with_name(cached.name + ".tmp")
+        try:
+            save_columns(tmp, parks.columns(), stamp=_stamp(csv_path))
+            os.replace(tmp, cached)
+        except OSError as e:
+            logging.warning(f"Could not write park sidecar {cached}: {e}")
+    return parks
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import date
+from pathlib import Path
+
+from utils import load_columns, save_columns
+
+DEFAULT_CACHE_DIR = ".schedule_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Cannot normalise {type(value).__name__} for hashing")
+
+
+class ScheduleCache:
+    """
+    On-disk cache of job tables, keyed by the content of their inputs.
+
+    Entries are NumPy ``.npz`` archives with one array per job table
+    column (see ``utils.save_columns``), so a hit loads straight into a
+    DataFrame without re-parsing.
+    When the directory grows past ``max_bytes`` the least recently used
+    entries are deleted.
+
+    Args:
+        directory (str): Cache directory (created on first write).
+        max_bytes (int): Size limit for all entries together.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(csv_path, config, engine, engine_version):
+        """Hash the parks CSV bytes, the loaded config and the engine identity."""
+        digest = hashlib.sha256()
+        with open(csv_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest.update(json.dumps(config, sort_keys=True, default=_json_default).encode())
+        digest.update(f"{engine}:{engine_version}".encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self.directory / f"{key}.npz"
+
+    def load(self, key):
+        """Return the cached job table for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            columns, index, _ = load_columns(path)
+        except (OSError, KeyError, ValueError) as e:
+            if path.exists():
+                logging.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+        os.utime(path)  # mark as recently used
+        import pandas as pd
+
+        return pd.DataFrame(columns, index=index)
+
+    def store(self, key, df):
+        """Save a job table under ``key`` and evict old entries if over the size limit."""
+        tmp = self.directory / f"{key}.tmp.npz"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            save_columns(tmp, {name: df[name].to_numpy() for name in df.columns}, index=df.index.to_numpy())
+            os.replace(tmp, self._path(key))
+            self.evict()
+        except OSError as e:
+            logging.warning(f"Could not write schedule cache entry: {e}")
+
+    def evict(self):
+        entries = sorted(self.directory.glob("*.npz"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in entries)
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink()
+            logging.debug(f"Evicted cache entry {path}")
@@ -0,0 +1,252 @@
+import bisect
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from incremental import earliest_affected_date, reschedule
+from scheduler import MowingScheduler
+from sinks import JOB_COLUMNS
+
+
+class ScheduleStore:
+    """
+    In-memory job table indexed for supervisors' questions.
+
+    Jobs (rows in ``export_jobs_to_df`` format plus ``Week`` and
+    ``Completed``) are kept as dicts under a row id and indexed by team and
+    date, date, park (in date order), suburb, week and job id, so a lookup
+    is a dict access plus the matching rows. Booked hours per team-day and
+    team-week are kept alongside for free-capacity questions.
+
+    Changes are applied in place: ``mark_completed`` flags jobs, and
+    ``apply_delta`` re-plans through ``incremental.reschedule`` and only
+    replaces the rows that changed.
+
+    Methods lock the store, so one instance can serve concurrent requests.
+
+    Args:
+        config (dict): Configuration from ``load_config``.
+        parks (ParkTable | list): Parks the schedule was built from.
+        jobs (DataFrame): Job table in ``export_jobs_to_df`` format.
+        engine (str): Assignment engine for ``apply_delta``.
+    """
+
+    def __init__(self, config, parks, jobs, engine="greedy"):
+        self.engine = engine
+        self._lock = threading.RLock()
+        self._set_schedule(MowingScheduler(config, parks))
+        self._rows = {}
+        self._next_id = 0
+        self._by_team_date = {}
+        self._by_date = {}
+        self._by_park = {}
+        self._by_suburb = {}
+        self._by_week = {}
+        self._by_job = {}
+        self._day_hours = {}
+        self._week_hours = {}
+        columns = [c for c in JOB_COLUMNS if c in jobs]
+        for row in jobs[columns].to_dict("records"):
+            self._add(row)
+
+    @classmethod
+    def from_scheduler(cls, scheduler, engine="greedy"):
+        """Store of a scheduler's jobs after ``assign_parks``."""
+        return cls(scheduler.config, scheduler.parks, scheduler.export_jobs_to_df(), engine)
+
+    def _set_schedule(self, scheduler):
+        self.config = scheduler.config
+        self.parks = scheduler.parks
+        self.calendar = scheduler.day_tracker.calendar
+        self.teams = scheduler.team_names()
+        self.max_daily_hours = scheduler._max_daily_hours()
+        self.last_available_day = {
+            team: self.calendar.get_next_day(d) - 1 for team, d in self.config.get("TEAM_UNAVAILABLE_FROM", {}).items()
+        }
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _add(self, row):
+        row = dict(row)
+        row["Week"] = self.calendar.get_week(row["Day"])
+        row.setdefault("Completed", False)
+        rid = self._next_id
+        self._next_id += 1
+        self._rows[rid] = row
+        team, day, hours = row["Team"], row["Date"], row["Estimated Hours"]
+        self._by_team_date.setdefault((team, day), []).append(rid)
+        self._by_date.setdefault(day, set()).add(rid)
+        bisect.insort(self._by_park.setdefault(row["Park"], []), (day, rid))
+        self._by_suburb.setdefault(row["Suburb"], set()).add(rid)
+        self._by_week.setdefault(row["Week"], set()).add(rid)
+        self._by_job.setdefault(row["job_id"], []).append(rid)
+        self._day_hours[(team, day)] = self._day_hours.get((team, day), 0.0) + hours
+        self._week_hours[(team, row["Week"])] = self._week_hours.get((team, row["Week"]), 0.0) + hours
+        return rid
+
+    def _remove(self, rid):
+        row = self._rows.pop(rid)
+        team, day, hours = row["Team"], row["Date"], row["Estimated Hours"]
+        self._discard(self._by_team_date, (team, day), rid)
+        self._discard(self._by_date, day, rid)
+        park_rows = self._by_park[row["Park"]]
+        del park_rows[bisect.bisect_left(park_rows, (day, rid))]
+        if not park_rows:
+            del self._by_park[row["Park"]]
+        self._discard(self._by_suburb, row["Suburb"], rid)
+        self._discard(self._by_week, row["Week"], rid)
+        self._discard(self._by_job, row["job_id"], rid)
+        self._day_hours[(team, day)] -= hours
+        self._week_hours[(team, row["Week"])] -= hours
+        return row
+
+    @staticmethod
+    def _discard(index, key, rid):
+        ids = index[key]
+        ids.remove(rid)
+        if not ids:
+            del index[key]
+
+    def _select(self, ids):
+        rows = [self._rows[rid] for rid in ids]
+        rows.sort(key=lambda row: (row["Date"], row["Team"], row["Park"], row["split_part"]))
+        return [dict(row) for row in rows]
+
+    def team_day(self, team, day):
+        """Jobs of ``team`` on ``day`` (ISO date)."""
+        with self._lock:
+            return self._select(self._by_team_date.get((team, day), ()))
+
+    def on_date(self, day):
+        """Every job on ``day`` (ISO date)."""
+        with self._lock:
+            return self._select(self._by_date.get(day, ()))
+
+    def park(self, name):
+        """Every job of a park, in date order."""
+        with self._lock:
+            return self._select(rid for _, rid in self._by_park.get(name, ()))
+
+    def next_mowing(self, name, after):
+        """First job of a park dated on or after ``after`` (ISO date) that is not completed, or None."""
+        with self._lock:
+            park_rows = self._by_park.get(name, ())
+            for _, rid in park_rows[bisect.bisect_left(park_rows, (after, -1)):]:
+                if not self._rows[rid]["Completed"]:
+                    return dict(self._rows[rid])
+            return None
+
+    def suburb(self, suburb, day=None):
+        """Jobs in a suburb, optionally only on ``day`` (ISO date)."""
+        with self._lock:
+            ids = self._by_suburb.get(suburb, set())
+            if day is not None:
+                ids = ids & self._by_date.get(day, set())
+            return self._select(ids)
+
+    def week(self, week):
+        """Jobs in working week ``week``."""
+        with self._lock:
+            return self._select(self._by_week.get(week, ()))
+
+    def job(self, job_id):
+        """Chunks of one job (a mowing of a park)."""
+        with self._lock:
+            return self._select(self._by_job.get(job_id, ()))
+
+    def free_teams(self, day, hours=0.0):
+        """
+        Teams with free hours on ``day`` (ISO date), most free first, as
+        ``{"Team", "Free Hours"}`` dicts. Only teams with more than ``hours``
+        free are listed; a day that is not worked has none.
+        """
+        with self._lock:
+            n = self.calendar.get_day(date.fromisoformat(day))
+            if n == 0:
+                return []
+            week = self.calendar.get_week(n)
+            limits = self.config["WEEKLY_HOUR_LIMITS"]
+            free = []
+            for team in self.teams:
+                if n > self.last_available_day.get(team, n):
+                    continue
+                left = min(self.max_daily_hours - self._day_hours.get((team, day), 0.0),
+                           limits.get(team, np.inf) - self._week_hours.get((team, week), 0.0))
+                if left > max(hours, MowingScheduler.ROUNDING_TOLERANCE):
+                    free.append({"Team": team, "Free Hours": round(left, 2)})
+            free.sort(key=lambda entry: -entry["Free Hours"])
+            return free
+
+    def mark_completed(self, job_id, day=None, completed=True):
+        """
+        Flag the chunks of a job (only those on ``day``, if given) as done.
+
+        Returns:
+            int: Number of chunks changed.
+
+        Raises:
+            KeyError: If the job (or its chunk on ``day``) is not in the store.
+        """
+        with self._lock:
+            ids = [rid for rid in self._by_job.get(job_id, ()) if day is None or self._rows[rid]["Date"] == day]
+            if not ids:
+                raise KeyError(f"No job {job_id!r}{f' on {day}' if day else ''}")
+            for rid in ids:
+                self._rows[rid]["Completed"] = completed
+            return len(ids)
+
+    def to_frame(self):
+        """The stored jobs as a DataFrame in ``export_jobs_to_df`` format (plus Week and Completed)."""
+        with self._lock:
+            rows = sorted(self._rows.values(), key=lambda row: (row["Team"], row["Day"]))
+            return pd.DataFrame(rows, columns=JOB_COLUMNS + ["Week", "Completed"])
+
+    def apply_delta(self, delta):
+        """
+        Re-plan after a change (see ``incremental.load_delta``) and update
+        the store in place: only rows from the first affected date on are
+        compared, and only those that changed are replaced. Unchanged rows
+        keep their Completed flag, and completed jobs are kept on their team
+        and date, even on a date the delta skips.
+
+        Returns:
+            DataFrame: The diff from ``incremental.reschedule``.
+        """
+        with self._lock:
+            saved = self.to_frame()
+            completed = saved["Completed"].astype(bool)
+            saved = saved.drop(columns=["Week", "Completed"])
+            cutoff = earliest_affected_date(self.config, saved, delta)
+            scheduler, new_jobs, diff = reschedule(self.config, self.parks, saved, delta, engine=self.engine,
+                                                   completed_jobs=saved[completed])
+            if cutoff is None:
+                return diff
+            self._set_schedule(scheduler)
+
+            # Match kept rows on every column but the working day number,
+            # which shifts when the delta skips dates
+            cutoff_iso = cutoff.isoformat()
+            keys = [c for c in JOB_COLUMNS if c in new_jobs and c != "Day"]
+            new_jobs = new_jobs[new_jobs["Date"] >= cutoff_iso]
+            added = {}
+            for row in new_jobs[keys + ["Day"]].to_dict("records"):
+                added.setdefault(tuple(row[c] for c in keys), []).append(row)
+            for day in [d for d in self._by_date if d >= cutoff_iso]:
+                for rid in list(self._by_date[day]):
+                    row = self._rows[rid]
+                    matches = added.get(tuple(row[c] for c in keys))
+                    if not matches:
+                        self._remove(rid)
+                        continue
+                    new_row = matches.pop()
+                    if row["Day"] != new_row["Day"]:
+                        row = self._remove(rid)
+                        row["Day"] = new_row["Day"]
+                        self._add(row)
+            for rows in added.values():
+                for row in rows:
+                    self._add(row)
+            return diff
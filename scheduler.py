@@ -1,227 +1,1105 @@
 import heapq
-import pandas as pd
-from utils import get_nth_working_day
+import logging
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+import numpy as np
+from dependencies import DependencyGraph
+from ledger import CapacityLedger, JobTable
+from park_loader import ParkTable
+from spatial import GridIndex, haversine_km
+from utils import WorkingCalendar
 
 
 class DayTracker:
-    def __init__(self, start_date, skipped_dates, workdays_per_week):
+    def __init__(self, start_date, skipped_dates, workdays_per_week, non_working_weekdays=(6,)):
         self.start_date = start_date
         self.skipped_dates = skipped_dates
         self.workdays_per_week = workdays_per_week
+        self.calendar = WorkingCalendar(start_date, skipped_dates, workdays_per_week, non_working_weekdays)
 
     def get_date(self, day):
-        return get_nth_working_day(self.start_date, day, self.skipped_dates)
+        return self.calendar.get_date(day)
 
     def get_week(self, day):
-        return ((day - 1) // self.workdays_per_week) + 1
+        return self.calendar.get_week(day)
+
+
+class TeamQueues:
+    """
+    Persistent per-group priority queues of teams keyed by
+    (next free day, full for that day, total hours, parks assigned, team).
+
+    Teams with no capacity left on their current day sort behind the ones
+    that still have some, so a pass over a day only reaches them once every
+    other team is exhausted. Entries are invalidated lazily: every change to
+    a team bumps its version and pushes a fresh entry, and stale entries are
+    dropped when they surface.
+    """
+
+    def __init__(self, group_members, ledger, counters=None):
+        self.ledger = ledger
+        self.counters = counters
+        self.heaps = {group: [] for group in group_members}
+        self.team_groups = {}
+        for group, teams in group_members.items():
+            for t in teams:
+                self.team_groups.setdefault(int(t), []).append(group)
+        self.versions = {t: -1 for t in self.team_groups}
+        for t in self.team_groups:
+            self.update(t)
+
+    def update(self, team):
+        ledger = self.ledger
+        day = int(ledger.current_day[team])
+        self.versions[team] += 1
+        if day > ledger.last_available_day[team]:
+            return  # past its last working day, so out of the queues for good
+        entry = (day, ledger.available_hours(team, ledger.get_week(day)) <= 0, float(ledger.total_hours[team]),
+                 int(ledger.park_counts[team]), team, self.versions[team])
+        for group in self.team_groups[team]:
+            heap = self.heaps[group]
+            heapq.heappush(heap, entry)
+            if len(heap) > 4 * len(self.team_groups) + 64:
+                self.heaps[group] = [e for e in heap if e[5] == self.versions[e[4]]]
+                heapq.heapify(self.heaps[group])
+                if self.counters is not None:
+                    self.counters["heap_rebuilds"] += 1
+
+    def _top(self, group):
+        heap = self.heaps[group]
+        while heap and heap[0][5] != self.versions[heap[0][4]]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def pop(self, groups, day=None):
+        """
+        Pop the next team across ``groups``, or None if there is none (on
+        ``day``, when given). Callers must ``update`` popped teams to requeue them.
+        """
+        best = None
+        for group in groups:
+            top = self._top(group)
+            if top is not None and (best is None or top < best[0]):
+                best = (top, group)
+        if best is None or (day is not None and best[0][0] != day):
+            return None
+        team = best[0][4]
+        self.take(team)
+        return team
+
+    def take(self, team):
+        """Remove ``team`` from every queue, as if it had been popped."""
+        self.versions[team] += 1
 
 
 class MowingScheduler:
+    ENGINES = ("greedy", "event")
+    # Bump whenever a change alters the schedules assign_parks produces, so
+    # cached results from older versions are not reused.
+    ENGINE_VERSION = 4
+    # Hours left on a park below this count as done (committed job hours are rounded to 0.01)
+    ROUNDING_TOLERANCE = 0.01
+    DEFAULT_NEARBY_RADIUS_KM = 5.0
+    # Ready parks a nearby-park query looks at before giving up
+    MAX_NEARBY_CANDIDATES = 32
+
     def __init__(self, config, parks):
         self.config = config
-        self.parks = parks
-        self.jobs = {}
+        self.parks = ParkTable.coerce(parks)
+        self.jobs = JobTable()
+        self.job_parks = array('q')
+        # Parks in the order assign_parks took them off its queues, with the
+        # due day of each (-1 in the first pass) and the job it started (0: none)
+        self.park_sequence = array('q')
+        self.sequence_due = array('q')
+        self.sequence_jobs = array('q')
+        self.ledger = None
         self.completed_jobs = set()
+        # Rows of jobs not yet handed out by iter_jobs (None when not streaming)
+        self._stream = None
+        # (team, day) of the last job chunk booked
+        self._last_booking = None
+        # Counter of hot-path events when a run is instrumented (see
+        # instrumentation.Instrumentation); None keeps the loops free of it
+        self.counters = None
         self.day_tracker = DayTracker(
             self.config["START_DATE"],
             self.config["SKIPPED_DATES"],
-            self.config["DEFAULT_WORKDAYS_PER_WEEK"]
+            self.config["DEFAULT_WORKDAYS_PER_WEEK"],
+            self.config.get("NON_WORKING_WEEKDAYS", (6,))
         )
 
-    def build_team_heap(self, team_status, team_list):
-        heap = []
-        for team in team_list:
-            status = team_status[team]
-            heap.append((status["total_hours_assigned"], len(status["parks_assigned_set"]), team))
-        heapq.heapify(heap)
-        return heap
-
-    def assign_parks(self):
-        parks_sorted = sorted(self.parks, key=lambda x: (-x.get("priority", 0), x["area_sqm"]))
-        all_teams = sorted({t for group in self.config["TEAM_NAME_MAPPING"].values() for t in group})
-        self.jobs = {t: [] for t in all_teams}
-        team_status = {
-            t: {
-                "team_name": t,
-                "current_day": 1,
-                "hours_assigned_today": 0,
-                "total_hours_assigned": self.config["HISTORICAL_HOURS"].get(t, 0),
-                "weekly_hours": {},
-                "parks_assigned_set": set(),
-            } for t in all_teams
-        }
+    def teams_by_load(self, teams):
+        """Order team indices by (total hours, parks assigned, team)."""
+        ledger = self.ledger
+        return teams[np.lexsort((teams, ledger.park_counts[teams], ledger.total_hours[teams]))]
+
+    def _park_order(self):
+        # lexsort is stable, so ties keep file order
+        return np.lexsort((self.parks.area_sqm, -self.parks.priority)).tolist()
+
+    def team_names(self):
+        """Every team in TEAM_NAME_MAPPING, in ledger (sorted) order."""
+        return sorted({t for group in self.config["TEAM_NAME_MAPPING"].values() for t in group})
+
+    def allowed_teams(self, suburb):
+        """
+        Team groups that may mow ``suburb`` and their teams' ledger indices
+        (groups in order, no repeats). A team in several of the groups counts
+        once; listing it twice used to move it forward two days per round.
+        """
+        mapping = self.config["TEAM_NAME_MAPPING"]
+        allowed_combined = list(self.config["SUBURB_TO_COMBINED_TEAM"].get(suburb, mapping.keys()))
+        allowed_individual = list(dict.fromkeys(self.ledger.index[t] for group in allowed_combined for t in mapping[group]))
+        return allowed_combined, np.array(allowed_individual, dtype=np.int64)
 
-        job_counter = 0
+    def validate(self):
+        """
+        Check that the config and parks can be scheduled, without scheduling
+        them: every suburb mapping names known team groups, every park has a
+        team that may mow it, teams in the per-team settings exist and the
+        dependencies have no cycle and name only known parks.
 
-        for park in parks_sorted:
-            if park["area_sqm"] <= 0:
+        Returns:
+            list: Problems found, as messages (empty when there are none).
+        """
+        problems = []
+        mapping = self.config["TEAM_NAME_MAPPING"]
+        if not self.team_names():
+            problems.append("TEAM_NAME_MAPPING has no teams")
+        for suburb, groups in self.config["SUBURB_TO_COMBINED_TEAM"].items():
+            unknown = [g for g in groups if g not in mapping]
+            if unknown:
+                problems.append(f"SUBURB_TO_COMBINED_TEAM[{suburb!r}] names unknown team group(s) {unknown}")
+        teams = set(self.team_names())
+        for key in ("WEEKLY_HOUR_LIMITS", "HISTORICAL_HOURS", "TEAM_UNAVAILABLE_FROM"):
+            unknown = sorted(set(self.config.get(key, {})) - teams)
+            if unknown:
+                problems.append(f"{key} names unknown team(s) {unknown}")
+        suburbs, counts = np.unique(self.parks.suburb, return_counts=True)
+        for suburb, count in zip(suburbs.tolist(), counts.tolist()):
+            groups = self.config["SUBURB_TO_COMBINED_TEAM"].get(suburb, mapping.keys())
+            if not any(mapping.get(g) for g in groups):
+                problems.append(f"No team may mow the {count} park(s) in {suburb}")
+        try:
+            graph = DependencyGraph(self.parks.name.tolist(), self.config["DEPENDENCIES"])
+        except ValueError as e:
+            problems.append(str(e))
+        else:
+            problems.extend(f"{name} depends on unknown park(s) {sorted(set(deps))}"
+                            for name, deps in graph.missing.items())
+        return problems
+
+    def _new_ledger(self):
+        ledger = CapacityLedger(
+            self.team_names(),
+            self._max_daily_hours(),
+            self.config["WEEKLY_HOUR_LIMITS"],
+            self.config["HISTORICAL_HOURS"],
+            self.config["DEFAULT_WORKDAYS_PER_WEEK"],
+        )
+        for team, unavailable_from in self.config.get("TEAM_UNAVAILABLE_FROM", {}).items():
+            if team in ledger.index:
+                ledger.last_available_day[ledger.index[team]] = self.day_tracker.calendar.get_next_day(unavailable_from) - 1
+        return ledger
+
+    def _book_frozen(self, frozen_jobs):
+        """
+        Book already committed jobs (rows in ``export_jobs_to_df`` format)
+        into the ledger and job table. Jobs dated on a day that is no longer
+        worked (work completed on a date a delta has since skipped) count
+        towards their park but book no capacity and are left out of the job
+        table.
+
+        Returns ``{park_idx: [hours done, finish day, job number, last split part]}``
+        for the latest job (mowing occurrence) of each park; earlier
+        occurrences are complete.
+        """
+        park_index = {}
+        for i, name in enumerate(self.parks.name.tolist()):
+            park_index.setdefault(name, i)
+        calendar = self.day_tracker.calendar
+        progress = {}
+        rows = zip(frozen_jobs["Team"], frozen_jobs["Date"], frozen_jobs["Park"], frozen_jobs["Area (sqm)"],
+                   frozen_jobs["Estimated Hours"], frozen_jobs["Overtime"], frozen_jobs["job_id"],
+                   frozen_jobs["split_part"])
+        for team_name, work_date, park_name, area, hours, overtime, job_id, split_part in rows:
+            team = self.ledger.index.get(team_name)
+            park_idx = park_index.get(park_name)
+            if team is None or park_idx is None:
+                logging.warning(f"Dropping committed job {job_id}: unknown team or park")
                 continue
-            if any(dep not in self.completed_jobs for dep in self.config["DEPENDENCIES"].get(park["name"], [])):
+            work_date = date.fromisoformat(work_date)
+            day = calendar.get_day(work_date)
+            job_number = int(str(job_id).rsplit("_", 1)[1])
+            if day:
+                self.jobs.append(team, day, park_idx, job_number, int(split_part), float(area), float(hours),
+                                 bool(overtime))
+                self.ledger.book(team, park_name, float(hours), day)
+            else:
+                day = calendar.get_next_day(work_date) - 1
+            done = progress.setdefault(park_idx, [0.0, 0, job_number, 0])
+            if job_number < done[2]:
                 continue
+            if job_number > done[2]:
+                done[:] = [0.0, 0, job_number, 0]
+            done[0] += float(hours)
+            done[1] = max(done[1], day)
+            done[3] = max(done[3], int(split_part))
+        return progress
 
-            total_time = (park["area_sqm"] / self.config["DEFAULT_MOWING_RATE_SQM_PER_HOUR"]) * (1 + self.config["DEFAULT_BUFFER"])
-            time_remaining = total_time
-            split_part = 1
-            job_counter += 1
-            job_id = f"{park['name'].replace(' ', '_')}_{job_counter}"
-            allowed_combined = self.config["SUBURB_TO_COMBINED_TEAM"].get(park["suburb"], self.config["TEAM_NAME_MAPPING"].keys())
-            allowed_individual = [t for group in allowed_combined for t in self.config["TEAM_NAME_MAPPING"][group]]
-
-            while time_remaining > 0:
-                if not allowed_individual:
-                    break
-                min_day = min(team_status[t]["current_day"] for t in allowed_individual)
-                work_date = self.day_tracker.get_date(min_day)
-                week = self.day_tracker.get_week(min_day)
-                team_heap = self.build_team_heap(team_status, allowed_individual)
-                assigned_any = False
-
-                for _, _, t in sorted(team_heap):
-                    status = team_status[t]
-
-                    # Sync current day
-                    if status["current_day"] < min_day:
-                        status["current_day"] = min_day
-                        status["hours_assigned_today"] = 0
-
-                    current_work_date = self.day_tracker.get_date(status["current_day"])
-                    if current_work_date != work_date:
-                        continue
+    def independent_components(self):
+        """
+        Split the problem into parts that share no teams.
 
-                    max_week_hours = self.config["WEEKLY_HOUR_LIMITS"].get(t, float('inf'))
-                    current_week_hours = status["weekly_hours"].get(week, 0)
+        Builds the graph linking each park to the groups its suburb may use,
+        groups to their teams, and parks to their dependencies, and returns
+        its connected components as ``(groups, park_indices)`` pairs ordered
+        by their first park. Parks with no allowed groups form their own
+        components.
+        """
+        mapping = self.config["TEAM_NAME_MAPPING"]
+        parent = {}
 
-                    max_daily_hours = self.config["DEFAULT_WORKDAY_HOURS"]
-                    if self.config["ALLOW_OVERTIME"]:
-                        max_daily_hours += self.config["MAX_OVERTIME_HOURS_PER_DAY"]
+        def find(node):
+            parent.setdefault(node, node)
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
 
-                    remaining = max_daily_hours - status["hours_assigned_today"]
-                    if remaining <= 0:
-                        continue
+        def union(a, b):
+            parent[find(a)] = find(b)
+
+        team_group = {}
+        for group, teams in mapping.items():
+            find(("group", group))
+            for t in teams:
+                if t in team_group:
+                    union(("group", group), ("group", team_group[t]))
+                team_group.setdefault(t, group)
+
+        parks_by_name = {}
+        for i, (name, suburb) in enumerate(zip(self.parks.name.tolist(), self.parks.suburb.tolist())):
+            parks_by_name.setdefault(name, []).append(i)
+            find(("park", i))
+            for group in self.config["SUBURB_TO_COMBINED_TEAM"].get(suburb, mapping.keys()):
+                union(("park", i), ("group", group))
+        for name, deps in self.config["DEPENDENCIES"].items():
+            for i in parks_by_name.get(name, []):
+                for dep in deps:
+                    for j in parks_by_name.get(dep, []):
+                        union(("park", i), ("park", j))
+
+        components = {}
+        for node in list(parent):
+            groups, parks = components.setdefault(find(node), ([], []))
+            (groups if node[0] == "group" else parks).append(node[1])
+        return sorted(
+            ((sorted(groups), parks) for groups, parks in components.values() if parks),
+            key=lambda component: component[1][0],
+        )
+
+    def _assign_parallel(self, engine, workers, components):
+        # Components never interact, so several can share one worker run.
+        # Pack them into at most ``workers`` buckets, largest first.
+        buckets = [([], []) for _ in range(min(workers, len(components)))]
+        for groups, park_indices in sorted(components, key=lambda c: -len(c[1])):
+            groups_, parks_ = min(buckets, key=lambda b: len(b[1]))
+            groups_.extend(groups)
+            parks_.extend(park_indices)
+        components = [(groups, sorted(parks)) for groups, parks in buckets if parks]
+
+        mapping = self.config["TEAM_NAME_MAPPING"]
+        tasks = []
+        for groups, park_indices in components:
+            config = dict(self.config)
+            config["TEAM_NAME_MAPPING"] = {g: mapping[g] for g in groups}
+            config["SUBURB_TO_COMBINED_TEAM"] = {
+                suburb: allowed for suburb, allowed in self.config["SUBURB_TO_COMBINED_TEAM"].items()
+                if set(allowed) <= set(groups)
+            }
+            tasks.append((config, self.parks.take(park_indices), engine))
 
-                    available_total = min(remaining, max_week_hours - current_week_hours)
-                    if available_total <= 0:
+        instrument = [self.counters is not None] * len(tasks)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_assign_component, *zip(*tasks), instrument))
+        if self.counters is not None:
+            for result in results:
+                self.counters.update(result[5])
+
+        # A serial run pops the lowest-ranked ready park across all
+        # components (and later mowings by due day, then rank), so merging
+        # the components' pop sequences by those keys gives the serial order
+        # in which jobs start, and so their numbers.
+        rank = {park_idx: r for r, park_idx in enumerate(self._park_order())}
+        popped = heapq.merge(*(
+            [(due, rank[park_indices[local_park]], c, local_park, n)
+             for local_park, due, n in zip(*result[4])]
+            for c, ((_, park_indices), result) in enumerate(zip(components, results))
+        ))
+        number_maps = [np.zeros(len(result[2]) + 1, dtype=np.int64) for result in results]
+        self.job_parks = array('q')
+        self.park_sequence = array('q')
+        self.sequence_due = array('q')
+        self.sequence_jobs = array('q')
+        for due, _, c, local_park, n in popped:
+            park_idx = components[c][1][local_park]
+            self.park_sequence.append(park_idx)
+            self.sequence_due.append(due)
+            self.sequence_jobs.append(len(self.job_parks) + 1 if n else 0)
+            if n:
+                number_maps[c][n] = len(self.job_parks) + 1
+                self.job_parks.append(park_idx)
+
+        self.ledger = self._new_ledger()
+        self.jobs = JobTable()
+        self.completed_jobs = set()
+        for (_, park_indices), number_map, (ledger, jobs, _, completed, _, _) in zip(components, number_maps, results):
+            self.ledger.absorb(ledger)
+            cols = jobs.columns()
+            team_map = np.array([self.ledger.index[t] for t in ledger.teams], dtype=np.int64)
+            cols["team"] = team_map[cols["team"]] if len(team_map) else cols["team"]
+            cols["park"] = np.asarray(park_indices, dtype=np.int64)[cols["park"]]
+            cols["job_number"] = number_map[cols["job_number"]]
+            self.jobs.extend(cols)
+            self.completed_jobs |= completed
+        return self.jobs
+
+    def assign_parks(self, engine="greedy", workers=1, frozen_jobs=None, start_day=1):
+        """
+        Schedule every park.
+
+        ``frozen_jobs`` (a DataFrame in ``export_jobs_to_df`` format) are kept
+        as they are and only the remaining work is planned, from working day
+        ``start_day`` on; see ``incremental.reschedule``.
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}; expected one of {self.ENGINES}")
+        if workers > 1 and frozen_jobs is None:
+            components = self.independent_components()
+            if len(components) > 1 and self._spatial_index() is not None:
+                # Nearby parks jump the priority order, so the serial order
+                # can no longer be rebuilt by merging the components' orders
+                logging.debug("Nearby-park clustering is on; scheduling serially")
+            elif len(components) > 1:
+                return self._assign_parallel(engine, workers, components)
+
+        for _ in self._schedule(engine, frozen_jobs, start_day):
+            pass
+        return self.jobs
+
+    def iter_jobs(self, engine="greedy", frozen_jobs=None, start_day=1):
+        """
+        Schedule every park like ``assign_parks``, yielding each job chunk as
+        soon as its park is placed instead of keeping it in ``self.jobs``.
+
+        Rows are dicts keyed like the ``export_jobs_to_df`` columns and come
+        in placement order (park by park), not sorted by team and day.
+        Memory no longer grows with the number of jobs, only with the
+        number of parks and days. Runs serially.
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}; expected one of {self.ENGINES}")
+        self._stream = []
+        try:
+            for _ in self._schedule(engine, frozen_jobs, start_day):
+                if self._stream:
+                    yield from self._stream
+                    self._stream = []
+        finally:
+            self._stream = None
+
+    def _schedule(self, engine, frozen_jobs, start_day):
+        # Serial scheduling loop; yields after each park so iter_jobs can
+        # hand out the park's jobs before the next one is placed.
+        park_order = self._park_order()
+        self.jobs = JobTable()
+        self.job_parks = array('q')
+        self.park_sequence = array('q')
+        self.sequence_due = array('q')
+        self.sequence_jobs = array('q')
+        self.ledger = self._new_ledger()
+        self.ledger.current_day[:] = start_day
+        progress = self._book_frozen(frozen_jobs) if frozen_jobs is not None else {}
+        group_members = {
+            group: [self.ledger.index[t] for t in dict.fromkeys(teams)]
+            for group, teams in self.config["TEAM_NAME_MAPPING"].items()
+        }
+        queues = TeamQueues(group_members, self.ledger, self.counters) if engine == "event" else None
+        allowed_by_suburb = {}
+
+        def allowed_for(suburb):
+            if suburb not in allowed_by_suburb:
+                allowed_by_suburb[suburb] = self.allowed_teams(suburb)
+            return allowed_by_suburb[suburb]
+
+        # Later mowings of recurring parks, as a heap of (due day, rank, park)
+        recurrence_days = self._recurrence_days()
+        due = []
+
+        names = self.parks.name.tolist()
+        areas = self.parks.area_sqm.tolist()
+        suburbs = self.parks.suburb.tolist()
+        graph = DependencyGraph(names, self.config["DEPENDENCIES"])
+        for name, deps in graph.missing.items():
+            logging.warning(f"{name} depends on unknown park(s) {sorted(set(deps))}; it will not be scheduled")
+        indegree = list(graph.indegree)
+        release_day = [0] * len(self.parks)
+        rank = [0] * len(self.parks)
+        for r, park_idx in enumerate(park_order):
+            rank[park_idx] = r
+        # Parks become ready once all their prerequisites are finished and
+        # are taken in the usual priority order among those that are ready.
+        ready = [(rank[i], i) for i in range(len(self.parks)) if indegree[i] == 0]
+        heapq.heapify(ready)
+
+        # With park locations, a team with hours left after a park fills them
+        # with the nearest ready park that fits, ahead of the priority order.
+        # The index holds exactly the ready parks not yet taken, layered by
+        # the team groups they may use.
+        spatial = self._spatial_index()
+        taken = [False] * len(self.parks)
+        index_ready = None
+        if spatial is not None:
+            radius = float(self.config.get("NEARBY_RADIUS_KM", self.DEFAULT_NEARBY_RADIUS_KM))
+
+            def index_ready(i):
+                spatial.add(i, tuple(allowed_for(suburbs[i])[0]))
+
+            for _, i in ready:
+                index_ready(i)
+        nearby = None
+
+        # Without committed jobs, job_parks[n - 1] is the park started as job n
+        job_counter = max((done[2] for done in progress.values()), default=0)
+        counters = self.counters
+
+        while ready:
+            yield
+            if nearby is not None:
+                park_idx, prefer = nearby
+                nearby = None
+            else:
+                _, park_idx = heapq.heappop(ready)
+                prefer = None
+                if taken[park_idx]:
+                    continue
+            taken[park_idx] = True
+            if counters is not None:
+                counters["parks_taken"] += 1
+                counters["nearby_fills"] += prefer is not None
+            if spatial is not None:
+                spatial.discard(park_idx)
+            self.park_sequence.append(park_idx)
+            self.sequence_due.append(-1)
+            self.sequence_jobs.append(0)
+            name, area, suburb = names[park_idx], areas[park_idx], suburbs[park_idx]
+            finish_day = 0
+            if area > 0:
+                total_time = (area / self.config["DEFAULT_MOWING_RATE_SQM_PER_HOUR"]) * (1 + self.config["DEFAULT_BUFFER"])
+                if park_idx in progress:
+                    hours_done, finish_day, job_number, split_part = progress[park_idx]
+                    total_time -= hours_done
+                    if total_time < self.ROUNDING_TOLERANCE:
+                        # Finished within the committed jobs
+                        self.completed_jobs.add(name)
+                        self._push_due(due, park_idx, finish_day, recurrence_days[park_idx], rank)
+                        self._release(graph, park_idx, finish_day, indegree, release_day, ready, rank, index_ready)
                         continue
+                    split_part += 1
+                else:
+                    job_counter += 1
+                    job_number = job_counter
+                    split_part = 1
+                    self.job_parks.append(park_idx)
+                    self.sequence_jobs[-1] = job_number
+                allowed_combined, allowed_individual = allowed_for(suburb)
 
-                    time_to_assign = min(available_total, time_remaining)
-                    area_chunk = time_to_assign * self.config["DEFAULT_MOWING_RATE_SQM_PER_HOUR"] / (1 + self.config["DEFAULT_BUFFER"])
-
-                    overtime_flag = (
-                        status["hours_assigned_today"] + time_to_assign > self.config["DEFAULT_WORKDAY_HOURS"]
-                        if self.config["ALLOW_OVERTIME"] else False
-                    )
-
-                    self.jobs[t].append({
-                        "job_id": job_id,
-                        "split_part": split_part,
-                        "name": park["name"],
-                        "suburb": park["suburb"],
-                        "area_sqm": round(area_chunk, 2),
-                        "estimated_hours": round(time_to_assign, 2),
-                        "day": status["current_day"],
-                        "date": work_date.isoformat(),
-                        "overtime": overtime_flag,
-                        "priority": park.get("priority", 0)
-                    })
+                release = release_day[park_idx]
+                working = self._working(allowed_individual)
+                if len(working) and release > self.ledger.current_day[working].min():
+                    finish_day, touched = self._place_park_after(
+                        park_idx, job_number, total_time, allowed_individual, release, split_part)
+                    if queues is not None:
+                        for t in touched:
+                            queues.update(t)
+                else:
+                    if engine == "event":
+                        finish_day = self._place_park_event(park_idx, job_number, total_time, allowed_combined,
+                                                            allowed_individual, queues, split_part, prefer)
+                    else:
+                        finish_day = self._place_park_greedy(park_idx, job_number, total_time, allowed_individual,
+                                                             split_part, prefer)
+                    if spatial is not None and finish_day is not None:
+                        nearby = self._nearby_park(spatial, park_idx, radius, allowed_for, release_day, progress)
+                if finish_day is None:
+                    continue
+                self.completed_jobs.add(name)
+                self._push_due(due, park_idx, finish_day, recurrence_days[park_idx], rank)
+
+            self._release(graph, park_idx, finish_day, indegree, release_day, ready, rank, index_ready)
 
+        blocked = [graph.names[i] for i in park_order if indegree[i] > 0]
+        if blocked:
+            logging.warning(f"{len(blocked)} park(s) not scheduled because their dependencies were not completed: "
+                            f"{', '.join(blocked[:10])}{' ...' if len(blocked) > 10 else ''}")
+
+        # Every park has had its first mowing; place the later ones in due
+        # order, each no earlier than its due day. A mowing that capacity
+        # would push to start after the horizon is dropped; one started in
+        # time may still finish after it.
+        horizon_end = self.config.get("RECURRENCE_HORIZON_END")
+        late = []
+        overrun = 0
+        while due:
+            yield
+            due_day, _, park_idx = heapq.heappop(due)
+            _, allowed_individual = allowed_for(suburbs[park_idx])
+            start_day = self.ledger.earliest_day_with_capacity(allowed_individual, due_day)
+            if start_day is not None and self.day_tracker.calendar.get_date(start_day) > horizon_end:
+                late.append(names[park_idx])
+                continue
+            job_counter += 1
+            if counters is not None:
+                counters["repeat_mowings"] += 1
+            self.job_parks.append(park_idx)
+            self.park_sequence.append(park_idx)
+            self.sequence_due.append(due_day)
+            self.sequence_jobs.append(job_counter)
+            total_time = (areas[park_idx] / self.config["DEFAULT_MOWING_RATE_SQM_PER_HOUR"]) * (1 + self.config["DEFAULT_BUFFER"])
+            finish_day, _ = self._place_park_after(park_idx, job_counter, total_time, allowed_individual, due_day)
+            if finish_day is not None:
+                overrun += self.day_tracker.calendar.get_date(finish_day) > horizon_end
+                self._push_due(due, park_idx, finish_day, recurrence_days[park_idx], rank)
+        if late:
+            logging.warning(f"{len(late)} repeat mowing(s) due by {horizon_end} could not start by then and were "
+                            f"dropped: {', '.join(late[:10])}{' ...' if len(late) > 10 else ''}")
+        if overrun:
+            logging.warning(f"{overrun} repeat mowing(s) started by {horizon_end} finish after it")
+        yield
+
+    def _recurrence_days(self):
+        """Days between mowings of each park; 0 for parks mowed once."""
+        days = self.parks.recurrence_days.copy()
+        if self.config.get("RECURRENCE_HORIZON_END") is None:
+            return [0] * len(days)
+        by_priority = self.config.get("RECURRENCE_DAYS_BY_PRIORITY", {})
+        unset = days == 0
+        days[unset] = [by_priority.get(p, 0) for p in self.parks.priority[unset].tolist()]
+        return days.tolist()
+
+    def _push_due(self, due, park_idx, finish_day, interval, rank):
+        """Queue the next mowing of a park finished on ``finish_day``, if it falls within the horizon."""
+        if interval <= 0:
+            return
+        calendar = self.day_tracker.calendar
+        finish = calendar.get_date(finish_day)
+        month_day = (finish.month, finish.day)
+        for season in self.config.get("RECURRENCE_SEASONS", []):
+            start, end = season["START"], season["END"]
+            if (start <= month_day <= end) if start <= end else (month_day >= start or month_day <= end):
+                interval = interval * season["FACTOR"]
+                break
+        due_date = finish + timedelta(days=max(1, round(interval)))
+        if due_date <= self.config["RECURRENCE_HORIZON_END"]:
+            heapq.heappush(due, (calendar.get_next_day(due_date), rank[park_idx], park_idx))
+
+    @staticmethod
+    def _release(graph, park_idx, finish_day, indegree, release_day, ready, rank, on_ready=None):
+        for succ in graph.successors[park_idx]:
+            release_day[succ] = max(release_day[succ], finish_day + 1)
+            indegree[succ] -= 1
+            if indegree[succ] == 0:
+                heapq.heappush(ready, (rank[succ], succ))
+                if on_ready is not None:
+                    on_ready(succ)
+
+    def _spatial_index(self):
+        """Empty grid index over the parks, or None unless nearby-park clustering applies."""
+        if not self.config.get("PREFER_NEARBY_PARKS", True) or not self.parks.has_coordinates():
+            return None
+        radius = float(self.config.get("NEARBY_RADIUS_KM", self.DEFAULT_NEARBY_RADIUS_KM))
+        if radius <= 0:
+            return None
+        # Small cells (a few parks each, at most a quarter of the radius) keep
+        # a query to the parks just around the one it starts from
+        cell_km = min(radius / 4, GridIndex.cell_size_for(self.parks.lat, self.parks.lon))
+        return GridIndex(self.parks.lat, self.parks.lon, cell_km)
+
+    def _nearby_park(self, spatial, park_idx, radius, allowed_for, release_day, progress):
+        """
+        ``(park, team)`` to place next, or None: the nearest ready park
+        within ``radius`` km of ``park_idx`` that fits in the hours the team
+        booked last has left today, among parks open to the same team groups.
+
+        Only parks that fill the gap jump the priority order, so a team's day
+        stays local without long detours through the rest of the queue.
+        """
+        team, day = self._last_booking
+        ledger = self.ledger
+        if ledger.current_day[team] != day:
+            return None
+        hours_left = ledger.available_hours(team, self.day_tracker.get_week(day))
+        if hours_left < self.ROUNDING_TOLERANCE:
+            return None
+        hours_per_sqm = (1 + self.config["DEFAULT_BUFFER"]) / self.config["DEFAULT_MOWING_RATE_SQM_PER_HOUR"]
+        areas = self.parks.area_sqm
+
+        def accept(j):
+            return 0 < areas[j] * hours_per_sqm <= hours_left and j not in progress and release_day[j] <= day
+
+        j = spatial.nearest(park_idx, radius, accept, layer=tuple(allowed_for(self.parks.suburb[park_idx])[0]),
+                            max_candidates=self.MAX_NEARBY_CANDIDATES)
+        return None if j is None else (j, team)
+
+    def _max_daily_hours(self):
+        max_daily_hours = self.config["DEFAULT_WORKDAY_HOURS"]
+        if self.config["ALLOW_OVERTIME"]:
+            max_daily_hours += self.config["MAX_OVERTIME_HOURS_PER_DAY"]
+        return max_daily_hours
+
+    def _record_job(self, team, park_idx, job_number, split_part, time_to_assign, day=None):
+        day = int(self.ledger.current_day[team]) if day is None else day
+        # Book the hours as recorded, so committed jobs re-booked from a saved
+        # table fill their days exactly as before
+        hours = round(time_to_assign, 2)
+        area_chunk = time_to_assign * self.config["DEFAULT_MOWING_RATE_SQM_PER_HOUR"] / (1 + self.config["DEFAULT_BUFFER"])
+
+        overtime_flag = (
+            self.ledger.hours_on(team, day) + time_to_assign > self.config["DEFAULT_WORKDAY_HOURS"]
+            if self.config["ALLOW_OVERTIME"] else False
+        )
+
+        if self._stream is not None:
+            name = self.parks.name[park_idx]
+            self._stream.append({
+                "Team": self.ledger.teams[team],
+                "Day": day,
+                "Date": self.day_tracker.get_date(day).isoformat(),
+                "Park": name,
+                "Suburb": self.parks.suburb[park_idx],
+                "Area (sqm)": round(area_chunk, 2),
+                "Estimated Hours": hours,
+                "Overtime": overtime_flag,
+                "Priority": int(self.parks.priority[park_idx]),
+                "job_id": f"{name.replace(' ', '_')}_{job_number}",
+                "split_part": split_part,
+            })
+        else:
+            self.jobs.append(
+                team, day, park_idx, job_number, split_part,
+                round(area_chunk, 2), hours, overtime_flag,
+            )
+        self.ledger.book(team, self.parks.name[park_idx], hours, day)
+        self._last_booking = (team, day)
+
+    def _place_park_greedy(self, park_idx, job_number, time_remaining, allowed_individual, split_part=1, prefer=None):
+        """
+        Place a park's hours; returns the day it finishes, or None if it could not be placed.
+
+        Team ``prefer``, if given, is offered the park's first hours ahead of
+        the load order, provided it is working on the earliest day.
+        """
+        ledger = self.ledger
+        counters = self.counters
+        while time_remaining > 0:
+            if counters is not None:
+                counters["placement_rounds"] += 1
+            if not len(allowed_individual):
+                return None
+            working = self._working(allowed_individual)
+            if not len(working):
+                logging.warning(f"No team can take {self.parks.name[park_idx]}; "
+                                f"skipping remaining {time_remaining:.2f}h")
+                return None
+            min_day = int(ledger.current_day[working].min())
+            week = self.day_tracker.get_week(min_day)
+            assigned_any = False
+
+            order = self.teams_by_load(allowed_individual).tolist()
+            if prefer is not None:
+                order.remove(prefer)
+                order.insert(0, prefer)
+                prefer = None
+            for t in order:
+                if ledger.current_day[t] != min_day:
+                    continue
+
+                available_total = ledger.available_hours(t, week)
+                if available_total <= 0:
+                    continue
+
+                time_to_assign = min(available_total, time_remaining)
+                self._record_job(t, park_idx, job_number, split_part, time_to_assign)
+                split_part += 1
+                time_remaining -= time_to_assign
+                assigned_any = True
+
+                if time_remaining <= 0:
+                    return min_day
+
+            if not assigned_any:
+                next_day = self._next_round_day(working[ledger.current_day[working] == min_day], min_day)
+                if next_day is None:
+                    logging.warning(f"No team can take {self.parks.name[park_idx]}; "
+                                    f"skipping remaining {time_remaining:.2f}h")
+                    return None
+                ledger.advance(allowed_individual, next_day - min_day)
+                if counters is not None:
+                    counters["day_advances"] += 1
+                    counters["days_skipped"] += next_day - min_day
+
+    def _working(self, teams):
+        """The ``teams`` (ledger indices) that have not passed their last available day."""
+        ledger = self.ledger
+        return teams[ledger.current_day[teams] <= ledger.last_available_day[teams]]
+
+    def _next_round_day(self, teams, day):
+        """
+        Day to move the allowed teams on to when ``teams``, the ones working
+        on ``day``, are all full: the first later day one of them has
+        capacity again or, if none ever does, the day after the last of them
+        stops working, when the teams behind them take over. None if the
+        teams never stop and never have capacity again.
+        """
+        ledger = self.ledger
+        next_day = ledger.earliest_day_with_capacity(teams, day + 1)
+        if next_day is None:
+            last = int(ledger.last_available_day[teams].max())
+            if last < np.iinfo(np.int64).max:
+                next_day = max(last, day) + 1
+        return next_day
+
+    def _place_park_event(self, park_idx, job_number, time_remaining, allowed_combined, allowed_individual, queues,
+                          split_part=1, prefer=None):
+        # Same placement rules as the greedy engine, but teams come off
+        # persistent per-group queues and idle days are skipped in one jump.
+        ledger = self.ledger
+        counters = self.counters
+        while time_remaining > 0:
+            if counters is not None:
+                counters["placement_rounds"] += 1
+            t = queues.pop(allowed_combined)
+            if t is None:
+                if len(allowed_individual):
+                    logging.warning(f"No team can take {self.parks.name[park_idx]}; "
+                                    f"skipping remaining {time_remaining:.2f}h")
+                return None
+            min_day = int(ledger.current_day[t])
+            week = self.day_tracker.get_week(min_day)
+            popped = []
+            assigned_any = False
+            after = None
+            if prefer is not None and prefer != t and ledger.current_day[prefer] == min_day:
+                queues.take(prefer)
+                t, after = prefer, t
+            prefer = None
+
+            while t is not None:
+                popped.append(t)
+                available_total = ledger.available_hours(t, week)
+                if available_total > 0:
+                    time_to_assign = min(available_total, time_remaining)
+                    self._record_job(t, park_idx, job_number, split_part, time_to_assign)
                     split_part += 1
-                    status["hours_assigned_today"] += time_to_assign
-                    status["total_hours_assigned"] += time_to_assign
-                    status["weekly_hours"][week] = current_week_hours + time_to_assign
-                    status["parks_assigned_set"].add(park["name"])
                     time_remaining -= time_to_assign
                     assigned_any = True
 
                     if time_remaining <= 0:
-                        self.completed_jobs.add(park["name"])
                         break
+                t, after = (after, None) if after is not None else (queues.pop(allowed_combined, min_day), None)
+            if after is not None:
+                popped.append(after)  # displaced by the preferred team and never reached
 
-                if not assigned_any:
-                    for t in allowed_individual:
-                        team_status[t]["current_day"] += 1
-                        team_status[t]["hours_assigned_today"] = 0
+            for t in popped:
+                queues.update(t)
 
-        return self.jobs
+            if not assigned_any:
+                # Every team on min_day is full: move the whole allowed set
+                # forward to the first day one of them has capacity again.
+                next_day = self._next_round_day(popped, min_day)
+                if next_day is None:
+                    logging.warning(f"No team can take {self.parks.name[park_idx]}; "
+                                    f"skipping remaining {time_remaining:.2f}h")
+                    return None
+                ledger.advance(allowed_individual, next_day - min_day)
+                if counters is not None:
+                    counters["day_advances"] += 1
+                    counters["days_skipped"] += next_day - min_day
+                for t in allowed_individual.tolist():
+                    queues.update(t)
+        return min_day
+
+    def _place_park_after(self, park_idx, job_number, time_remaining, allowed_individual, release, split_part=1):
+        """
+        Place a park on days from ``release`` on, ahead of where the allowed
+        teams currently are, without moving them. Used for parks whose
+        prerequisites finish later than the teams' current day.
+
+        Returns the finish day (None if it could not be placed) and the teams
+        that were booked.
+        """
+        ledger = self.ledger
+        counters = self.counters
+        touched = []
+        day = release
+        if counters is not None:
+            counters["placements_after_release"] += 1
+        while True:
+            if counters is not None:
+                counters["placement_rounds"] += 1
+            free = ledger.free_hours(allowed_individual, [day])[:, 0]
+            for i in np.lexsort((allowed_individual, ledger.park_counts[allowed_individual],
+                                 ledger.total_hours[allowed_individual])).tolist():
+                if free[i] <= 0:
+                    continue
+                t = int(allowed_individual[i])
+                time_to_assign = min(float(free[i]), time_remaining)
+                self._record_job(t, park_idx, job_number, split_part, time_to_assign, day)
+                split_part += 1
+                time_remaining -= time_to_assign
+                touched.append(t)
+                if time_remaining <= 0:
+                    return day, touched
+            day = ledger.earliest_day_with_capacity(allowed_individual, day + 1)
+            if day is None:
+                logging.warning(f"No team can take {self.parks.name[park_idx]}; "
+                                f"skipping remaining {time_remaining:.2f}h")
+                return None, touched
+
+    def job_columns(self):
+        """The ``export_jobs_to_df`` columns as a dict of arrays and lists, in team order."""
+        cols = self.jobs.columns()
+        order = np.argsort(cols["team"], kind="stable")
+        cols = {name: values[order] for name, values in cols.items()}
+        calendar = self.day_tracker.calendar
+        days = np.unique(cols["day"])
+        dates = dict(zip(days.tolist(), (calendar.get_date(d).isoformat() for d in days.tolist())))
+
+        names = self.parks.name
+        suburbs = self.parks.suburb
+        priorities = self.parks.priority
+        job_names = np.array([name.replace(' ', '_') for name in names.tolist()], dtype=object)
+        park = cols["park"]
+
+        columns = {
+            "Team": np.array(self.ledger.teams if self.ledger else [], dtype=object)[cols["team"]],
+            "Day": cols["day"],
+            "Date": [dates[d] for d in cols["day"].tolist()],
+            "Park": names[park],
+            "Suburb": suburbs[park],
+            "Area (sqm)": cols["area_sqm"],
+            "Estimated Hours": cols["estimated_hours"],
+            "Overtime": cols["overtime"],
+            "Priority": priorities[park],
+            "job_id": [f"{job_names[p]}_{n}" for p, n in zip(park.tolist(), cols["job_number"].tolist())],
+            "split_part": cols["split_part"],
+        }
+        if self.parks.has_coordinates():
+            columns["Latitude"] = self.parks.lat[park]
+            columns["Longitude"] = self.parks.lon[park]
+        return columns
 
     def export_jobs_to_df(self):
-        rows = []
-        for team, assignments in self.jobs.items():
-            for job in assignments:
-                rows.append({
-                    "Team": team,
-                    "Day": job["day"],
-                    "Date": job["date"],
-                    "Park": job["name"],
-                    "Suburb": job["suburb"],
-                    "Area (sqm)": job["area_sqm"],
-                    "Estimated Hours": job["estimated_hours"],
-                    "Overtime": job["overtime"],
-                    "Priority": job.get("priority", 0),
-                    "job_id": job["job_id"],
-                    "split_part": job["split_part"]
-                })
-        df = pd.DataFrame(rows)
+        import pandas as pd
+
+        df = pd.DataFrame(self.job_columns())
         df.sort_values(by=["Team", "Day"], inplace=True)
         return df
 
+    def job_rows(self):
+        """
+        Jobs as dicts keyed like the ``iter_jobs`` rows, in
+        ``export_jobs_to_df`` order, built without pandas.
+        """
+        cols = self.job_columns()
+        _, team_codes = np.unique(cols["Team"], return_inverse=True)
+        order = np.lexsort((cols["Day"], team_codes))
+        names = [name for name in cols if name not in ("Latitude", "Longitude")]
+        values = [np.asarray(cols[name])[order].tolist() for name in names]
+        for row in zip(*values):
+            yield dict(zip(names, row))
+
     def add_week_and_weekday(self, df):
         df = df.copy()
-        df['Week'] = df['Day'].apply(self.day_tracker.get_week)
-        df['Weekday'] = pd.to_datetime(df['Date']).dt.strftime('%a')
+        calendar = self.day_tracker.calendar
+        days = df['Day'].unique()
+        weeks = {d: calendar.get_week(d) for d in days}
+        weekdays = {d: calendar.get_date(d).strftime('%a') for d in days}
+        df['Week'] = df['Day'].map(weeks)
+        df['Weekday'] = df['Day'].map(weekdays)
         return df
 
     def build_calendar(self, df, week_range=None):
-        calendar = {}
-        for _, row in df.iterrows():
-            week = row['Week']
-            if week_range and week not in week_range:
-                continue
-            team = row['Team']
-            day = row['Weekday']
-            text = f"{row['Park']} ({row['Estimated Hours']}h)"
-            calendar.setdefault(team, {}).setdefault(week, {}).setdefault(day, []).append(text)
+        """
+        One row per team and one column per week and weekday ("W1 Mon"),
+        each cell listing the team's jobs that day as "Park (hours h)",
+        sorted and newline-separated.
+        """
+        import pandas as pd
 
-        all_weeks = sorted({w for t in calendar.values() for w in t})
+        if week_range:
+            df = df[df["Week"].isin(week_range)]
+        if df.empty:
+            return pd.DataFrame()
         weekdays = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
-        rows = []
-
-        for team in sorted(calendar):
-            row = {"Team": team}
-            for week in all_weeks:
-                for day in weekdays:
-                    key = f"W{week} {day}"
-                    items = calendar.get(team, {}).get(week, {}).get(day, [])
-                    row[key] = "\n".join(sorted(items))
-            rows.append(row)
-        return pd.DataFrame(rows)
+
+        team_codes, teams = pd.factorize(df["Team"], sort=True)
+        week_codes, weeks = pd.factorize(df["Week"], sort=True)
+        day_codes = pd.Index(weekdays).get_indexer(df["Weekday"])
+        text = (df["Park"] + " (" + df["Estimated Hours"].astype(str) + "h)").to_numpy(dtype=object)
+        text_codes, _ = pd.factorize(text, sort=True)
+
+        # Sort by cell, then by text, and join each run of equal cells
+        cell = (team_codes * len(weeks) + week_codes) * len(weekdays) + day_codes
+        keep = day_codes >= 0
+        cell, text_codes, text = cell[keep], text_codes[keep], text[keep]
+        order = np.lexsort((text_codes, cell))
+        cell, text = cell[order], text[order].tolist()
+        starts = np.flatnonzero(np.diff(cell, prepend=-1)).tolist()
+
+        grid = np.full(len(teams) * len(weeks) * len(weekdays), "", dtype=object)
+        grid[cell[starts]] = ["\n".join(text[a:b]) for a, b in zip(starts, starts[1:] + [len(text)])]
+        grid = grid.reshape(len(teams), -1)
+
+        columns = [f"W{week} {day}" for week in weeks.tolist() for day in weekdays]
+        calendar = pd.DataFrame(grid, columns=columns)
+        calendar.insert(0, "Team", np.asarray(teams, dtype=object))
+        return calendar.infer_objects()
+
+    def travel_by_team_day(self, df):
+        """
+        Estimated travel of every team-day: the great-circle distance (km)
+        between consecutive located parks, visited in job order. Needs the
+        Latitude/Longitude columns ``export_jobs_to_df`` adds when parks
+        have coordinates.
+        """
+        located = df[df["Latitude"].notna() & df["Longitude"].notna()]
+        job_number = located["job_id"].str.rsplit("_", n=1).str[1].astype(np.int64)
+        located = located.assign(_job=job_number).sort_values(["Team", "Day", "_job", "split_part"], kind="stable")
+        lat = located["Latitude"].to_numpy(dtype=float)
+        lon = located["Longitude"].to_numpy(dtype=float)
+        same_day = (located["Team"].to_numpy()[1:] == located["Team"].to_numpy()[:-1]) & \
+                   (located["Day"].to_numpy()[1:] == located["Day"].to_numpy()[:-1])
+        legs = np.zeros(len(located))
+        legs[1:] = np.where(same_day, haversine_km(lat[:-1], lon[:-1], lat[1:], lon[1:]), 0.0)
+        travel = located.assign(Travel_Km=legs).groupby(["Team", "Day", "Date"], as_index=False).agg(
+            Parks=("Park", "nunique"),
+            Travel_Km=("Travel_Km", "sum"),
+        )
+        return travel.round(2)
 
     def generate_metrics(self, df):
-        overtime = df["Overtime"].astype(bool)
+        summary = df.assign(
+            Overtime_Hours=df["Estimated Hours"].where(df["Overtime"].astype(bool), 0.0)
+        ).groupby("Team").agg(
+            Total_Parks=("Park", "nunique"),
+            Total_Area_Sqm=("Area (sqm)", "sum"),
+            Total_Hours=("Estimated Hours", "sum"),
+            Days_Worked=("Day", "nunique"),
+            Total_Overtime_Hours=("Overtime_Hours", "sum"),
+        )
+
+        summary["Avg_Hours_Per_Day"] = (summary["Total_Hours"] / summary["Days_Worked"].replace(0, 1)).round(2)
+        if "Latitude" in df:
+            travel = self.travel_by_team_day(df).groupby("Team")["Travel_Km"].agg(["sum", "mean"])
+            summary["Total_Travel_Km"] = travel["sum"].reindex(summary.index, fill_value=0.0)
+            summary["Avg_Travel_Km_Per_Day"] = travel["mean"].reindex(summary.index, fill_value=0.0)
+
+        return summary.round(2)
 
-        # Count unique days worked per team
-        days_worked = df.groupby("Team")["Day"].nunique()
 
-        # Sum total hours per team
-        total_hours = df.groupby("Team")["Estimated Hours"].sum()
+    def team_summary(self, weeks=None):
+        """
+        Per-team totals of the job table, as ``generate_metrics`` computes
+        them from the exported jobs but with NumPy alone, so plain-text
+        metrics need no DataFrame. ``weeks`` keeps only those working weeks.
 
-        # Count unique parks per team
-        total_parks = df.groupby("Team")["Park"].nunique()
+        Returns:
+            list: One dict per team with jobs, in team order.
+        """
+        cols = self.jobs.columns()
+        if weeks:
+            days = np.unique(cols["day"])
+            week_of_day = np.array([self.day_tracker.calendar.get_week(d) for d in days.tolist()], dtype=np.int64)
+            keep = np.isin(cols["day"], days[np.isin(week_of_day, list(weeks))])
+            cols = {name: values[keep] for name, values in cols.items()}
+        team_ids, team = np.unique(cols["team"], return_inverse=True)
+        n = len(team_ids)
+        hours = cols["estimated_hours"]
+        # Parks are counted by name, like nunique over the Park column
+        _, name_codes = np.unique(self.parks.name, return_inverse=True)
 
-        # Sum area per team
-        total_area = df.groupby("Team")["Area (sqm)"].sum()
+        def total(values):
+            return np.bincount(team, weights=values, minlength=n)
 
-        # Sum overtime hours per team (handle teams with no overtime gracefully)
-        total_overtime_hours = df.loc[overtime].groupby("Team")["Estimated Hours"].sum()
-        total_overtime_hours = total_overtime_hours.reindex(total_hours.index, fill_value=0)
+        def distinct(values):
+            pairs = np.unique(np.column_stack([team, values]), axis=0) if n else np.zeros((0, 2), dtype=np.int64)
+            return np.bincount(pairs[:, 0], minlength=n)
 
-        summary = pd.DataFrame({
-            "Total_Parks": total_parks,
-            "Total_Area_Sqm": total_area,
-            "Total_Hours": total_hours,
+        days_worked = distinct(cols["day"])
+        summary = {
+            "Team": [self.ledger.teams[t] for t in team_ids.tolist()],
+            "Total_Parks": distinct(name_codes[cols["park"]]),
+            "Total_Area_Sqm": total(cols["area_sqm"]),
+            "Total_Hours": total(hours),
             "Days_Worked": days_worked,
-            "Total_Overtime_Hours": total_overtime_hours,
-        }).fillna(0)
+            "Total_Overtime_Hours": total(np.where(cols["overtime"], hours, 0.0)),
+            "Avg_Hours_Per_Day": total(hours) / np.maximum(days_worked, 1),
+        }
+        if self.parks.has_coordinates():
+            # Legs between consecutive located parks of a team-day, in job order
+            lat, lon = self.parks.lat[cols["park"]], self.parks.lon[cols["park"]]
+            located = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+            located = located[np.lexsort((cols["split_part"][located], cols["job_number"][located],
+                                          cols["day"][located], team[located]))]
+            lat, lon, day_team, day = lat[located], lon[located], team[located], cols["day"][located]
+            legs = np.zeros(len(located))
+            same_day = (day_team[1:] == day_team[:-1]) & (day[1:] == day[:-1])
+            legs[1:] = np.where(same_day, haversine_km(lat[:-1], lon[:-1], lat[1:], lon[1:]), 0.0)
+            team_days, cell = np.unique(np.column_stack([day_team, day]), axis=0, return_inverse=True)
+            day_km = np.round(np.bincount(cell.ravel(), weights=legs, minlength=len(team_days)), 2)
+            km = np.bincount(team_days[:, 0], weights=day_km, minlength=n) if len(team_days) else np.zeros(n)
+            counted = np.bincount(team_days[:, 0], minlength=n) if len(team_days) else np.zeros(n, dtype=np.int64)
+            summary["Total_Travel_Km"] = km
+            summary["Avg_Travel_Km_Per_Day"] = np.divide(km, counted, out=np.zeros(n), where=counted > 0)
+        columns = {name: values if name == "Team" else np.round(values, 2).tolist() for name, values in summary.items()}
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
 
-        summary["Avg_Hours_Per_Day"] = (summary["Total_Hours"] / summary["Days_Worked"].replace(0, 1)).round(2)
 
-        return summary.round(2)
+def _assign_component(config, parks, engine, instrument=False):
+    """Schedule one independent component in a worker process."""
+    scheduler = MowingScheduler(config, parks)
+    if instrument:
+        scheduler.counters = Counter()
+    scheduler.assign_parks(engine=engine)
+    sequence = (scheduler.park_sequence, scheduler.sequence_due, scheduler.sequence_jobs)
+    counters = scheduler.counters or Counter()
+    if instrument:
+        counters["date_lookups"] += scheduler.day_tracker.calendar.lookups
+    return scheduler.ledger, scheduler.jobs, scheduler.job_parks, scheduler.completed_jobs, sequence, counters
+
+
+def compare_engines(config, parks, engines=MowingScheduler.ENGINES):
+    """
+    Run every engine on the same input and check their job tables match the
+    first one. Returns True when all engines agree.
+    """
+    reference = None
+    agree = True
+    for engine in engines:
+        scheduler = MowingScheduler(config, parks)
+        scheduler.assign_parks(engine=engine)
+        df = scheduler.export_jobs_to_df().reset_index(drop=True)
+        if reference is None:
+            reference = (engine, df)
+            continue
+        if not df.equals(reference[1]):
+            logging.error(f"Engine {engine!r} differs from {reference[0]!r}")
+            agree = False
+        else:
+            logging.info(f"Engine {engine!r} matches {reference[0]!r} ({len(df)} jobs)")
+    return agree
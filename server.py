@@ -0,0 +1,113 @@
+import json
+import logging
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from incremental import parse_delta
+
+# Largest request body accepted (a delta or a completion note)
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def _routes(store):
+    """(method, path pattern, handler(match, query, body)) for every endpoint."""
+    def param(query, name, default=None):
+        return query.get(name, [default])[0]
+
+    def next_mowing(match, query, body):
+        job = store.next_mowing(match["park"], param(query, "after", ""))
+        if job is None:
+            raise KeyError(f"No upcoming mowing of {match['park']!r}")
+        return job
+
+    def complete(match, query, body):
+        day = body.get("date")
+        return {"updated": store.mark_completed(match["job"], day, bool(body.get("completed", True)))}
+
+    def delta(match, query, body):
+        diff = store.apply_delta(parse_delta(body))
+        return {
+            "removed": int((diff["Change"] == "removed").sum()),
+            "added": int((diff["Change"] == "added").sum()),
+            "jobs": len(store),
+        }
+
+    return [
+        ("GET", r"/teams/(?P<team>[^/]+)/days/(?P<day>[^/]+)", lambda m, q, b: store.team_day(m["team"], m["day"])),
+        ("GET", r"/days/(?P<day>[^/]+)", lambda m, q, b: store.on_date(m["day"])),
+        ("GET", r"/days/(?P<day>[^/]+)/free", lambda m, q, b: store.free_teams(m["day"], float(param(q, "hours", 0)))),
+        ("GET", r"/parks/(?P<park>[^/]+)", lambda m, q, b: store.park(m["park"])),
+        ("GET", r"/parks/(?P<park>[^/]+)/next", next_mowing),
+        ("GET", r"/suburbs/(?P<suburb>[^/]+)", lambda m, q, b: store.suburb(m["suburb"], param(q, "date"))),
+        ("GET", r"/weeks/(?P<week>\d+)", lambda m, q, b: store.week(int(m["week"]))),
+        ("GET", r"/jobs/(?P<job>[^/]+)", lambda m, q, b: store.job(m["job"])),
+        ("POST", r"/jobs/(?P<job>[^/]+)/complete", complete),
+        ("POST", r"/delta", delta),
+    ]
+
+
+def make_handler(store):
+    """Request handler class answering JSON queries from ``store`` (a ``ScheduleStore``)."""
+    routes = [(method, re.compile(pattern + "$"), handler) for method, pattern, handler in _routes(store)]
+
+    class ScheduleHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def _dispatch(self, method):
+            url = urlsplit(self.path)
+            path = unquote(url.path).rstrip("/") or "/"
+            for route_method, pattern, handler in routes:
+                match = pattern.match(path)
+                if match and route_method == method:
+                    break
+            else:
+                self._send(404, {"error": f"No endpoint {method} {path}"})
+                return
+            try:
+                body = self._read_body() if method == "POST" else {}
+                result = handler(match.groupdict(), parse_qs(url.query), body)
+            except KeyError as e:
+                self._send(404, {"error": str(e.args[0]) if e.args else "Not found"})
+            except (ValueError, TypeError) as e:
+                self._send(400, {"error": str(e)})
+            else:
+                self._send(200, result)
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                raise ValueError(f"Request body over {MAX_BODY_BYTES} bytes")
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("Request body must be a JSON object")
+            return body
+
+        def _send(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logging.debug(f"{self.address_string()} {format % args}")
+
+    return ScheduleHandler
+
+
+def serve(store, host="127.0.0.1", port=8080):
+    """Answer queries from ``store`` over HTTP until interrupted."""
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    logging.info(f"Serving {len(store)} jobs on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,164 @@
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from scheduler import MowingScheduler
+from utils import WorkingCalendar
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+# Scenarios sent to a worker per task
+CHUNK_SIZE = 16
+# Calendar days of weather sampled past the dry-weather schedule, as a
+# multiple of its length (stretched further for wet climates)
+HORIZON_FACTOR = 2
+
+# Per-process state set by _init_worker, so each task only carries its
+# scenario number and the parks and config are pickled once per worker.
+_worker = None
+
+
+def rain_probabilities(config, start, days):
+    """Chance of losing each of the ``days`` calendar days after ``start`` to rain."""
+    by_month = config.get("RAIN_PROBABILITY_BY_MONTH", {})
+    default = config.get("RAIN_PROBABILITY", 0.0)
+    months = np.array([(start + timedelta(days=d + 1)).month for d in range(days)])
+    table = np.array([by_month.get(m, default) for m in range(13)])
+    return table[months]
+
+
+def sample_bad_weather(probabilities, start, seed, scenario):
+    """
+    Rain days of one scenario. The draws depend only on ``seed`` and
+    ``scenario``, so a scenario is the same whichever worker runs it.
+    """
+    rng = np.random.default_rng([seed, scenario])
+    wet = np.flatnonzero(rng.random(len(probabilities)) < probabilities)
+    return {start + timedelta(days=int(d) + 1) for d in wet}
+
+
+def _init_worker(config, parks, engine, probabilities, seed):
+    global _worker
+    # Dry-weather calendar: rain only costs a day this one would work
+    calendar = WorkingCalendar(config["START_DATE"], config["SKIPPED_DATES"], config["DEFAULT_WORKDAYS_PER_WEEK"],
+                               config.get("NON_WORKING_WEEKDAYS", (6,)))
+    _worker = (config, parks, engine, probabilities, seed, calendar)
+
+
+def _run_scenario(scenario):
+    """
+    Schedule one weather scenario with the worker's parks and config.
+
+    Returns (scenario, working days lost to rain up to the finish, finish
+    date ordinal, overtime hours, hours per team, finish date ordinal per
+    team (0 if idle)).
+    """
+    config, parks, engine, probabilities, seed, dry_calendar = _worker
+    start = config["START_DATE"]
+    rain = sample_bad_weather(probabilities, start, seed, scenario)
+    config = dict(config)
+    config["BAD_WEATHER_DAYS"] = config["BAD_WEATHER_DAYS"] | rain
+    config["SKIPPED_DATES"] = config["PUBLIC_HOLIDAYS"] | config["BAD_WEATHER_DAYS"]
+
+    scheduler = MowingScheduler(config, parks)
+    scheduler.assign_parks(engine=engine)
+    cols = scheduler.jobs.columns()
+    calendar = scheduler.day_tracker.calendar
+    n_teams = len(scheduler.ledger.teams)
+    hours = np.bincount(cols["team"], weights=cols["estimated_hours"], minlength=n_teams)
+    last_day = np.zeros(n_teams, dtype=np.int64)
+    np.maximum.at(last_day, cols["team"], cols["day"])
+    team_finish = np.array([calendar.get_date(d).toordinal() if d else 0 for d in last_day.tolist()], dtype=np.int64)
+    finish = int(team_finish.max()) if len(cols["day"]) else start.toordinal()
+    rain_days = sum(1 for d in rain if d.toordinal() <= finish and dry_calendar.get_day(d))
+    overtime = float(cols["estimated_hours"][cols["overtime"]].sum())
+    return scenario, rain_days, finish, overtime, hours, team_finish
+
+
+def simulate(config, parks, runs, engine="greedy", workers=1, seed=0, horizon_days=None):
+    """
+    Schedule ``runs`` random weather scenarios.
+
+    Each calendar day is lost to rain with the probability configured for
+    its month (RAIN_PROBABILITY_BY_MONTH, else RAIN_PROBABILITY), on top of
+    the fixed BAD_WEATHER_DAYS. Weather is sampled for ``horizon_days``
+    calendar days from the start date; by default that is a multiple of the
+    dry-weather schedule's length.
+
+    Args:
+        config (dict): Configuration from ``load_config``.
+        parks (ParkTable | list): Parks to schedule.
+        runs (int): Number of scenarios.
+        engine (str): Assignment engine.
+        workers (int): Run scenarios in this many processes.
+        seed (int): Seed of the weather draws; equal seeds give equal results.
+        horizon_days (int, optional): Calendar days of sampled weather.
+
+    Returns:
+        tuple: (DataFrame with one row per scenario, DataFrame of hours per
+        scenario and team, DataFrame of finish dates per scenario and team)
+    """
+    if runs < 1:
+        raise ValueError(f"Number of runs must be positive, got {runs}")
+    start = config["START_DATE"]
+    if horizon_days is None:
+        _init_worker(config, parks, engine, np.zeros(0), seed)
+        dry_finish = _run_scenario(0)[2]
+        wettest = max([config.get("RAIN_PROBABILITY", 0.0), *config.get("RAIN_PROBABILITY_BY_MONTH", {}).values()])
+        horizon_days = math.ceil(HORIZON_FACTOR * max(dry_finish - start.toordinal(), 1) / (1 - wettest)) + 30
+    probabilities = rain_probabilities(config, start, horizon_days)
+    if not probabilities.any():
+        logging.warning("No rain probabilities configured; every scenario has the same weather")
+
+    init_args = (config, parks, engine, probabilities, seed)
+    if workers > 1 and runs > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = list(pool.map(_run_scenario, range(runs), chunksize=CHUNK_SIZE))
+    else:
+        _init_worker(*init_args)
+        results = [_run_scenario(scenario) for scenario in range(runs)]
+
+    teams = MowingScheduler(config, []).team_names()
+    scenario, rain_days, finish, overtime, hours, team_finish = zip(*results)
+    runs_df = pd.DataFrame({
+        "Scenario": scenario,
+        "Rain_Days": rain_days,
+        "Finish_Date": [date.fromordinal(d) for d in finish],
+        "Overtime_Hours": np.round(overtime, 2),
+    })
+    hours_df = pd.DataFrame(np.vstack(hours), columns=teams, index=pd.Index(scenario, name="Scenario"))
+    finish_df = pd.DataFrame(np.vstack(team_finish), columns=teams, index=pd.Index(scenario, name="Scenario"))
+    return runs_df, hours_df, finish_df
+
+
+def summarize(runs_df, hours_df, finish_df, percentiles=DEFAULT_PERCENTILES):
+    """
+    Percentiles of a simulation.
+
+    Returns:
+        tuple: (one row per percentile with the completion date, rain days
+        and overtime hours at that percentile; one row per team with its
+        mean and percentile hours and finish dates)
+    """
+    finish = np.array([d.toordinal() for d in runs_df["Finish_Date"]])
+    summary = pd.DataFrame({
+        "Percentile": [f"P{p}" for p in percentiles],
+        "Finish_Date": [date.fromordinal(int(np.percentile(finish, p, method="higher"))) for p in percentiles],
+        "Rain_Days": [np.percentile(runs_df["Rain_Days"], p, method="higher") for p in percentiles],
+        "Overtime_Hours": [round(float(np.percentile(runs_df["Overtime_Hours"], p)), 2) for p in percentiles],
+    })
+
+    teams = pd.DataFrame({
+        "Team": hours_df.columns,
+        "Mean_Hours": hours_df.mean().round(2).to_numpy(),
+        "Std_Hours": hours_df.std(ddof=0).round(2).to_numpy(),
+    })
+    for p in percentiles:
+        teams[f"P{p}_Hours"] = np.percentile(hours_df.to_numpy(), p, axis=0).round(2)
+    for p in percentiles:
+        ordinals = np.percentile(finish_df.to_numpy(), p, axis=0, method="higher")
+        teams[f"P{p}_Finish"] = [date.fromordinal(int(d)) if d else None for d in ordinals]
+    return summary, teams
@@ -0,0 +1,132 @@
+import csv
+import json
+import sys
+from pathlib import Path
+
+JOB_COLUMNS = [
+    "Team", "Day", "Date", "Park", "Suburb", "Area (sqm)", "Estimated Hours",
+    "Overtime", "Priority", "job_id", "split_part",
+]
+
+
+class JobSink:
+    """
+    Incremental writer for job rows (dicts keyed by ``JOB_COLUMNS``).
+
+    ``path`` may be a file path or "-" for standard output. Sinks are
+    context managers; rows are written as they arrive, so memory stays
+    flat however long the schedule is.
+    """
+
+    binary = False
+
+    def __init__(self, path):
+        self.path = path
+        self.rows_written = 0
+        if path == "-":
+            self._file = sys.stdout.buffer if self.binary else sys.stdout
+            self._owns_file = False
+        else:
+            self._file = open(path, "wb" if self.binary else "w", **({} if self.binary else {"newline": ""}))
+            self._owns_file = True
+
+    def write(self, row):
+        self._write(row)
+        self.rows_written += 1
+
+    def write_all(self, rows):
+        for row in rows:
+            self.write(row)
+        return self.rows_written
+
+    def _write(self, row):
+        raise NotImplementedError
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlSink(JobSink):
+    """One JSON object per line."""
+
+    def _write(self, row):
+        self._file.write(json.dumps(row) + "\n")
+
+
+class CsvSink(JobSink):
+    """CSV with a header row, readable by ``--reschedule`` like ``--save-jobs`` output."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._writer = csv.DictWriter(self._file, fieldnames=JOB_COLUMNS)
+        self._writer.writeheader()
+
+    def _write(self, row):
+        self._writer.writerow(row)
+
+
+class ParquetSink(JobSink):
+    """
+    Parquet file written one row group per ``batch_rows`` rows.
+
+    Needs the optional ``pyarrow`` package.
+    """
+
+    binary = True
+
+    def __init__(self, path, batch_rows=100_000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output needs the pyarrow package (pip install pyarrow)") from e
+        self._pa = pa
+        self._schema = pa.schema([
+            ("Team", pa.string()), ("Day", pa.int64()), ("Date", pa.string()), ("Park", pa.string()),
+            ("Suburb", pa.string()), ("Area (sqm)", pa.float64()), ("Estimated Hours", pa.float64()),
+            ("Overtime", pa.bool_()), ("Priority", pa.int64()), ("job_id", pa.string()), ("split_part", pa.int64()),
+        ])
+        super().__init__(path)
+        self._writer = pq.ParquetWriter(self._file, self._schema)
+        self.batch_rows = batch_rows
+        self._batch = []
+
+    def _write(self, row):
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if self._batch:
+            self._writer.write_table(self._pa.Table.from_pylist(self._batch, schema=self._schema))
+            self._batch = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        super().close()
+
+
+SINKS = {"jsonl": JsonlSink, "csv": CsvSink, "parquet": ParquetSink}
+
+
+def open_sink(path, fmt=None):
+    """
+    Open the sink for ``path``. The format is ``fmt`` or, if omitted, taken
+    from the file extension (stdout defaults to JSONL).
+    """
+    if fmt is None:
+        suffix = Path(path).suffix.lower().lstrip(".")
+        fmt = {"json": "jsonl", "ndjson": "jsonl", "pq": "parquet"}.get(suffix, suffix) if path != "-" else "jsonl"
+    if fmt not in SINKS:
+        raise ValueError(f"Unknown job output format {fmt!r}; expected one of {sorted(SINKS)}")
+    return SINKS[fmt](path)
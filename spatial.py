@@ -0,0 +1,114 @@
+import heapq
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between points given in degrees (array-friendly)."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GridIndex:
+    """
+    Uniform grid over park coordinates for radius queries.
+
+    Points are projected to kilometres around the mean latitude (accurate
+    enough at city scale) and bucketed into square cells of ``cell_km``.
+    Only the cells overlapping a query circle are scanned, so a query costs
+    time proportional to the points near it, not to the whole table. Points
+    can be added and removed in O(1), which lets the scheduler keep just the
+    parks that are ready to be placed in the index. Each point lives in one
+    ``layer`` (any hashable key) and queries only see their own layer.
+
+    Args:
+        lat (array): Latitudes in degrees; NaN for parks without coordinates.
+        lon (array): Longitudes in degrees.
+        cell_km (float): Cell size; the usual query radius is a good choice.
+    """
+
+    def __init__(self, lat, lon, cell_km):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        self.cell_km = float(cell_km)
+        located = np.isfinite(lat) & np.isfinite(lon)
+        lat0 = float(lat[located].mean()) if located.any() else 0.0
+        self.x = (lon * KM_PER_DEGREE * math.cos(math.radians(lat0))).tolist()
+        self.y = (lat * KM_PER_DEGREE).tolist()
+        self.located = located.tolist()
+        cx = np.floor(np.where(located, lon * KM_PER_DEGREE * math.cos(math.radians(lat0)), 0) / self.cell_km)
+        cy = np.floor(np.where(located, lat * KM_PER_DEGREE, 0) / self.cell_km)
+        self.cell_of = list(zip(cx.astype(np.int64).tolist(), cy.astype(np.int64).tolist()))
+        self.cells = {}
+        self.layer_of = {}
+
+    @staticmethod
+    def cell_size_for(lat, lon, points_per_cell=4):
+        """Cell size (km) that puts about ``points_per_cell`` points in each cell of the bounding box."""
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        located = np.isfinite(lat) & np.isfinite(lon)
+        if located.sum() < 2:
+            return 1.0
+        lat, lon = lat[located], lon[located]
+        height = np.ptp(lat) * KM_PER_DEGREE
+        width = np.ptp(lon) * KM_PER_DEGREE * math.cos(math.radians(float(lat.mean())))
+        return max(0.01, math.sqrt(max(height * width, 1e-6) * points_per_cell / len(lat)))
+
+    def add(self, i, layer=None):
+        """Add point ``i`` to ``layer`` (ignored if it has no coordinates)."""
+        if self.located[i]:
+            self.cells.setdefault((layer,) + self.cell_of[i], set()).add(i)
+            self.layer_of[i] = layer
+
+    def discard(self, i):
+        layer = self.layer_of.pop(i, None)
+        key = (layer,) + self.cell_of[i]
+        cell = self.cells.get(key)
+        if cell is not None:
+            cell.discard(i)
+            if not cell:
+                del self.cells[key]
+
+    def nearest(self, i, radius_km, accept=None, layer=None, max_candidates=None):
+        """
+        Nearest point of ``layer`` within ``radius_km`` of point ``i``
+        (itself excluded) for which ``accept(j)`` holds, or None.
+
+        Cells are scanned in rings around ``i``'s cell. A candidate is only
+        returned once no unscanned cell can hold a closer one, so the search
+        usually stops after the first ring or two. With ``max_candidates``
+        the search gives up after rejecting that many points, which bounds
+        the cost of a query however dense the layer is.
+        """
+        if not self.located[i]:
+            return None
+        x, y = self.x[i], self.y[i]
+        cx, cy = self.cell_of[i]
+        reach = math.ceil(radius_km / self.cell_km)
+        candidates = []
+        rejected = 0
+        for ring in range(reach + 1):
+            for gx in range(cx - ring, cx + ring + 1):
+                step = 1 if abs(gx - cx) == ring else 2 * ring
+                for gy in range(cy - ring, cy + ring + 1, max(step, 1)):
+                    for j in self.cells.get((layer, gx, gy), ()):
+                        if j != i:
+                            distance = math.hypot(self.x[j] - x, self.y[j] - y)
+                            if distance <= radius_km:
+                                heapq.heappush(candidates, (distance, j))
+            # Points in cells outside this ring are more than ring * cell_km away
+            settled = radius_km if ring == reach else ring * self.cell_km
+            while candidates and candidates[0][0] <= settled:
+                _, j = heapq.heappop(candidates)
+                if accept is None or accept(j):
+                    return j
+                rejected += 1
+                if max_candidates is not None and rejected >= max_candidates:
+                    return None
+        return None
@@ -0,0 +1,115 @@
+import copy
+import logging
+import unittest
+from datetime import date
+from pathlib import Path
+
+from config_loader import load_config
+from incremental import parse_delta, reschedule
+from park_loader import load_parks_from_csv
+from schedule_store import ScheduleStore
+from scheduler import MowingScheduler
+
+HERE = Path(__file__).resolve().parent
+CONFIG = HERE / "config.json"
+SAMPLE_CSV = HERE / "sample_parks_300.csv"
+
+
+class RescheduleTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+        cls.config = load_config(CONFIG)
+        cls.parks = load_parks_from_csv(SAMPLE_CSV)
+        scheduler = MowingScheduler(copy.deepcopy(cls.config), cls.parks)
+        scheduler.assign_parks()
+        cls.saved = scheduler.export_jobs_to_df()
+        cls.summary = scheduler.team_summary()
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_empty_delta_keeps_jobs_in_scheduler(self):
+        scheduler, jobs, diff = reschedule(copy.deepcopy(self.config), self.parks, self.saved, parse_delta({}))
+        self.assertTrue(diff.empty)
+        self.assertIs(jobs, self.saved)
+        self.assertEqual(len(scheduler.jobs), len(self.saved))
+        self.assertEqual(len(list(scheduler.job_rows())), len(self.saved))
+        self.assertEqual(scheduler.team_summary(), self.summary)
+
+    def test_rain_on_non_working_day_changes_nothing(self):
+        sunday = date(2025, 7, 13)
+        self.assertEqual(sunday.weekday(), 6)
+        delta = parse_delta({"BAD_WEATHER_DAYS": [sunday.isoformat()]})
+        _, jobs, diff = reschedule(copy.deepcopy(self.config), self.parks, self.saved, delta)
+        self.assertTrue(diff.empty)
+        self.assertIs(jobs, self.saved)
+
+    def test_from_date_alone_keeps_saved_jobs(self):
+        delta = parse_delta({"FROM_DATE": "2025-07-21"})
+        _, jobs, diff = reschedule(copy.deepcopy(self.config), self.parks, self.saved, delta)
+        self.assertTrue(diff.empty)
+        self.assertIs(jobs, self.saved)
+
+    def test_replanned_days_stay_within_workday(self):
+        delta = parse_delta({"BAD_WEATHER_DAYS": ["2025-07-21"]})
+        _, jobs, _ = reschedule(copy.deepcopy(self.config), self.parks, self.saved, delta)
+        for df in (self.saved, jobs):
+            hours = df.groupby(["Team", "Date"])["Estimated Hours"].sum()
+            self.assertLessEqual(hours.max(), self.config["DEFAULT_WORKDAY_HOURS"] + 1e-9)
+
+    def test_jobs_before_cutoff_are_kept(self):
+        delta = parse_delta({"BAD_WEATHER_DAYS": ["2025-07-21"]})
+        _, jobs, diff = reschedule(copy.deepcopy(self.config), self.parks, self.saved, delta)
+        before = lambda df: df[df["Date"] < "2025-07-21"].reset_index(drop=True)
+        self.assertTrue(before(self.saved).equals(before(jobs)))
+        self.assertFalse((jobs["Date"] == "2025-07-21").any())
+        self.assertFalse(diff.empty)
+        self.assertGreaterEqual(diff["Date"].min(), date(2025, 7, 21).isoformat())
+
+
+class ScheduleStoreDeltaTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def store(self):
+        scheduler = MowingScheduler(load_config(CONFIG), load_parks_from_csv(SAMPLE_CSV))
+        scheduler.assign_parks()
+        return ScheduleStore.from_scheduler(scheduler)
+
+    def test_completed_jobs_keep_team_date_and_flag(self):
+        store = self.store()
+        job_id = "Emerald_Park_#19_73"
+        before = [(row["Team"], row["Date"]) for row in store.job(job_id)]
+        store.mark_completed(job_id)
+        store.apply_delta(parse_delta({"BAD_WEATHER_DAYS": ["2025-07-09"]}))
+        after = store.job(job_id)
+        self.assertEqual([(row["Team"], row["Date"]) for row in after], before)
+        self.assertTrue(all(row["Completed"] for row in after))
+        self.assertEqual(sum(row["Completed"] for row in store.to_frame().to_dict("records")), len(after))
+
+    def test_rain_after_completed_work_still_moves_other_jobs(self):
+        store = self.store()
+        job_id = "Emerald_Park_#19_73"
+        day = store.job(job_id)[0]["Date"]
+        teams = {row["Team"] for row in store.job(job_id)}
+        others = [row for row in store.on_date(day) if row["Team"] not in teams]
+        self.assertTrue(others)
+        chunks = store.mark_completed(job_id)
+        store.apply_delta(parse_delta({"BAD_WEATHER_DAYS": [day]}))
+        after = store.job(job_id)
+        self.assertEqual(len(after), chunks)
+        self.assertTrue(all(row["Completed"] and row["Date"] == day for row in after))
+        # Nobody else works on the rain date
+        self.assertEqual([row["job_id"] for row in store.on_date(day)], [job_id] * chunks)
+        self.assertEqual(store.free_teams(day), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
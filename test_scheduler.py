@@ -0,0 +1,220 @@
+import copy
+import logging
+import unittest
+from datetime import date
+from pathlib import Path
+
+from config_loader import load_config
+from park_loader import load_parks_from_csv
+from scheduler import MowingScheduler
+
+HERE = Path(__file__).resolve().parent
+CONFIG = HERE / "config.json"
+SAMPLE_CSV = HERE / "sample_parks_300.csv"
+
+
+def schedule(config, parks, engine="greedy", workers=1):
+    scheduler = MowingScheduler(copy.deepcopy(config), parks)
+    scheduler.assign_parks(engine=engine, workers=workers)
+    return scheduler
+
+
+def jobs(scheduler):
+    return scheduler.export_jobs_to_df().reset_index(drop=True)
+
+
+def regional_config():
+    """Three regions of two team groups each that share no teams, so they can be scheduled in parallel."""
+    config = load_config(CONFIG)
+    groups = {f"G{g}": [f"Team {g}.{t}" for t in range(2 + g % 3)] for g in range(6)}
+    config["TEAM_NAME_MAPPING"] = groups
+    config["SUBURB_TO_COMBINED_TEAM"] = {
+        f"Suburb {s}": [f"G{2 * (s % 3)}"] if s < 3 else [f"G{2 * (s % 3)}", f"G{2 * (s % 3) + 1}"] for s in range(6)
+    }
+    config["WEEKLY_HOUR_LIMITS"] = {team: 30 for members in groups.values() for team in members}
+    config["ALLOW_OVERTIME"] = True
+    return config
+
+
+def overlapping_config():
+    """The regional config with one team in two groups of each region and one team shared across regions."""
+    config = regional_config()
+    groups = config["TEAM_NAME_MAPPING"]
+    for g in range(0, 6, 2):
+        groups[f"G{g + 1}"].append(groups[f"G{g}"][0])
+    groups["G5"].append("Team 0.1")
+    return config
+
+
+def regional_parks(n=240):
+    return [
+        {"name": f"Park {i}", "area_sqm": 1000.0 + (i * 7919) % 15000, "suburb": f"Suburb {i % 6}", "priority": i % 3}
+        for i in range(n)
+    ]
+
+
+class EngineParityTest(unittest.TestCase):
+    """Every assignment path must produce the same jobs as the greedy engine."""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+        cls.config = load_config(CONFIG)
+        cls.parks = load_parks_from_csv(SAMPLE_CSV)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def assertSameJobs(self, expected, actual):
+        self.assertTrue(expected.equals(actual), f"job tables differ:\n{expected.compare(actual)}")
+
+    def test_event_engine_matches_greedy_on_sample(self):
+        expected = jobs(schedule(self.config, self.parks, "greedy"))
+        self.assertGreater(len(expected), 0)
+        self.assertSameJobs(expected, jobs(schedule(self.config, self.parks, "event")))
+
+    def test_parallel_matches_serial(self):
+        config, parks = regional_config(), regional_parks()
+        self.assertEqual(len(MowingScheduler(config, parks).independent_components()), 3)
+        for engine in MowingScheduler.ENGINES:
+            with self.subTest(engine=engine):
+                self.assertSameJobs(jobs(schedule(config, parks, engine)), jobs(schedule(config, parks, engine, workers=3)))
+
+    def test_engines_agree_on_overlapping_groups(self):
+        config, parks = overlapping_config(), regional_parks()
+        self.assertEqual(len(MowingScheduler(config, parks).independent_components()), 2)
+        expected = jobs(schedule(config, parks, "greedy"))
+        for engine in MowingScheduler.ENGINES:
+            for workers in (1, 2):
+                with self.subTest(engine=engine, workers=workers):
+                    self.assertSameJobs(expected, jobs(schedule(config, parks, engine, workers)))
+        streamed = list(MowingScheduler(copy.deepcopy(config), parks).iter_jobs(engine="event"))
+        self.assertEqual(len(streamed), len(expected))
+
+    def test_parallel_matches_serial_on_sample(self):
+        expected = jobs(schedule(self.config, self.parks, "greedy"))
+        self.assertSameJobs(expected, jobs(schedule(self.config, self.parks, "event", workers=2)))
+
+    def test_stream_matches_assign(self):
+        for engine in MowingScheduler.ENGINES:
+            with self.subTest(engine=engine):
+                expected = list(schedule(self.config, self.parks, engine).job_rows())
+                streamed = list(MowingScheduler(copy.deepcopy(self.config), self.parks).iter_jobs(engine=engine))
+                key = lambda row: (row["Team"], row["Day"], row["job_id"], row["split_part"])
+                self.assertEqual(sorted(expected, key=key), sorted(streamed, key=key))
+
+
+class TeamUnavailableTest(unittest.TestCase):
+    """Teams that stop working (TEAM_UNAVAILABLE_FROM) hand their share to the teams still working."""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def check(self, config, parks):
+        """Schedule with both engines; they must agree, and nobody works past their last day."""
+        results = {engine: schedule(config, parks, engine) for engine in MowingScheduler.ENGINES}
+        expected = jobs(results["greedy"])
+        self.assertTrue(expected.equals(jobs(results["event"])))
+        for team, unavailable_from in config["TEAM_UNAVAILABLE_FROM"].items():
+            worked = expected.loc[expected["Team"] == team, "Date"]
+            self.assertTrue((worked < unavailable_from.isoformat()).all(), f"{team} works after it stopped")
+        return expected
+
+    def test_two_teams_one_stops(self):
+        # Team 2 runs ahead on its own suburb; Team 1 stops early, and the
+        # shared parks must then go to Team 2 rather than wait for Team 1
+        config = load_config(CONFIG)
+        config["TEAM_NAME_MAPPING"] = {"North": ["Team 1"], "South": ["Team 2"]}
+        config["SUBURB_TO_COMBINED_TEAM"] = {"Mine": ["North"], "Theirs": ["South"], "Shared": ["North", "South"]}
+        config["WEEKLY_HOUR_LIMITS"] = {}
+        config["TEAM_UNAVAILABLE_FROM"] = {"Team 1": date(2025, 7, 10)}
+        parks = ([{"name": f"Theirs {i}", "area_sqm": 8000.0, "suburb": "Theirs", "priority": 2} for i in range(8)]
+                 + [{"name": f"Mine {i}", "area_sqm": 8000.0, "suburb": "Mine", "priority": 1} for i in range(4)]
+                 + [{"name": f"Shared {i}", "area_sqm": 8000.0, "suburb": "Shared"} for i in range(4)])
+        df = self.check(config, parks)
+        shared = df[df["Park"].str.startswith("Shared")]
+        self.assertEqual(shared["Park"].nunique(), 4)
+        self.assertEqual(set(shared["Team"]), {"Team 2"})
+
+    def test_group_stops_on_sample(self):
+        config = load_config(CONFIG)
+        north = config["TEAM_NAME_MAPPING"]["North"]
+        config["TEAM_UNAVAILABLE_FROM"] = {team: date(2025, 7, 15) for team in north}
+        parks = load_parks_from_csv(SAMPLE_CSV)
+        df = self.check(config, parks)
+        # Only parks North alone may mow are left out
+        missing = set(parks.name.tolist()) - set(df["Park"])
+        north_only = {name for name, suburb in zip(parks.name.tolist(), parks.suburb.tolist())
+                      if config["SUBURB_TO_COMBINED_TEAM"].get(suburb) == ["North"]}
+        self.assertTrue(missing <= north_only, sorted(missing - north_only)[:5])
+        self.assertIn("Emerald Park #225", set(df["Park"]))
+
+
+class OverlappingGroupsTest(unittest.TestCase):
+    """A team in several groups that may mow a suburb is one team, not one per group."""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_shared_team_takes_its_share(self):
+        config = load_config(CONFIG)
+        config["TEAM_NAME_MAPPING"] = {"North": ["Team 1", "Team 2"], "Both": ["Team 2", "Team 3"]}
+        config["SUBURB_TO_COMBINED_TEAM"] = {"Mixed": ["North", "Both"]}
+        config["WEEKLY_HOUR_LIMITS"] = {}
+        parks = [{"name": f"Park {i}", "area_sqm": 6000.0, "suburb": "Mixed"} for i in range(30)]
+        for engine in MowingScheduler.ENGINES:
+            with self.subTest(engine=engine):
+                df = jobs(schedule(config, parks, engine))
+                last_days = []
+                for team in ("Team 1", "Team 2", "Team 3"):
+                    days = sorted(set(df.loc[df["Team"] == team, "Day"]))
+                    self.assertEqual(days, list(range(1, days[-1] + 1)), team)
+                    last_days.append(days[-1])
+                self.assertLessEqual(max(last_days) - min(last_days), 1)
+                self.assertLessEqual(df.groupby(["Team", "Day"])["Estimated Hours"].sum().max(),
+                                     config["DEFAULT_WORKDAY_HOURS"] + 1e-9)
+
+
+class RecurrenceHorizonTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_no_mowing_starts_after_horizon(self):
+        config = load_config(CONFIG)
+        config["RECURRENCE_HORIZON_END"] = date(2026, 6, 30)
+        config["RECURRENCE_DAYS_BY_PRIORITY"] = {0: 14}
+        config["RECURRENCE_SEASONS"] = [{"START": (5, 1), "END": (8, 31), "FACTOR": 2.0}]
+        parks = load_parks_from_csv(SAMPLE_CSV)
+        parks.recurrence_days[:20] = 7
+        df = jobs(schedule(config, parks))
+        starts = df.groupby("job_id")["Date"].min()
+        self.assertGreater(df["job_id"].nunique(), len(parks))
+        self.assertLessEqual(starts.max(), "2026-06-30")
+
+
+class ValidateTest(unittest.TestCase):
+    def test_unknown_prerequisite_is_a_problem(self):
+        config = load_config(CONFIG)
+        config["DEPENDENCIES"] = {"Emerald Park #225": ["No Such Park"]}
+        problems = MowingScheduler(config, load_parks_from_csv(SAMPLE_CSV)).validate()
+        self.assertTrue(any("No Such Park" in problem for problem in problems), problems)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,41 +1,172 @@
 from datetime import date, timedelta
 from typing import Set
 
+import numpy as np
 
-def get_nth_working_day(start_date: date, n: int, skipped_dates: Set[date]) -> date:
+
+class WorkingCalendar:
     """
-    Return the date of the nth working day after start_date,
-    skipping dates in skipped_dates.
+    Precomputed index of working days counted from a start date.
+
+    Working day ``n`` is the nth date after ``start_date`` (exclusive) that is
+    neither in ``skipped_dates`` nor falls on one of ``non_working_weekdays``.
+    Lookups in either direction are O(1); the index extends itself lazily
+    when a day or date past the current horizon is requested.
 
     Args:
         start_date (date): The starting date (exclusive).
-        n (int): Number of working days to advance.
-        skipped_dates (Set[date]): Dates to skip.
-
-    Returns:
-        date: The nth working day date.
+        skipped_dates (Set[date]): Individual dates to skip (holidays, weather).
+        workdays_per_week (int): Number of workdays per week.
+        non_working_weekdays (Iterable[int]): Weekdays never worked (Monday=0).
     """
-    current = start_date
-    count = 0
-    while count < n:
-        current += timedelta(days=1)
-        if current not in skipped_dates:
-            count += 1
-    return current
 
+    EXTEND_DAYS = 366
+
+    def __init__(self, start_date: date, skipped_dates: Set[date], workdays_per_week: int,
+                 non_working_weekdays=(6,)):
+        self.start_date = start_date
+        self.skipped_dates = frozenset(skipped_dates)
+        self.workdays_per_week = workdays_per_week
+        self.non_working_weekdays = frozenset(non_working_weekdays)
+        if len(self.non_working_weekdays) >= 7:
+            raise ValueError("At least one weekday must be a working day.")
+        # Date <-> day conversions served, for instrumentation reports
+        self.lookups = 0
+        # _dates[n] is working day n (index 0 is the start date itself);
+        # _day_at[k] is the working day number of start_date + k days, or 0
+        # when that date is not worked.
+        self._dates = [start_date]
+        self._day_at = [0]
+        self._extend(self.EXTEND_DAYS)
+
+    def _extend(self, calendar_days: int) -> None:
+        current = self.start_date + timedelta(days=len(self._day_at) - 1)
+        for _ in range(calendar_days):
+            current += timedelta(days=1)
+            if current in self.skipped_dates or current.weekday() in self.non_working_weekdays:
+                self._day_at.append(0)
+            else:
+                self._dates.append(current)
+                self._day_at.append(len(self._dates) - 1)
+
+    def get_date(self, n: int) -> date:
+        """
+        Return the date of working day ``n``.
+
+        Args:
+            n (int): Working day number (1-based; 0 returns the start date).
+
+        Returns:
+            date: The nth working day date.
+        """
+        if n < 0:
+            raise ValueError(f"Working day must be non-negative, got {n}")
+        self.lookups += 1
+        while n >= len(self._dates):
+            self._extend(self.EXTEND_DAYS)
+        return self._dates[n]
+
+    def get_day(self, date_obj: date) -> int:
+        """
+        Return the working day number of a date.
+
+        Args:
+            date_obj (date): The date to look up.
+
+        Returns:
+            int: Working day number, or 0 if the date is not a working day
+            (skipped, a non-working weekday, or on/before the start date).
+        """
+        self.lookups += 1
+        offset = (date_obj - self.start_date).days
+        if offset <= 0:
+            return 0
+        while offset >= len(self._day_at):
+            self._extend(self.EXTEND_DAYS)
+        return self._day_at[offset]
+
+    def get_next_day(self, date_obj: date) -> int:
+        """
+        Return the working day number of the first working day on or after a date.
 
-def get_week(date_obj: date, workdays_per_week: int) -> int:
+        Args:
+            date_obj (date): The date to look up.
+
+        Returns:
+            int: Working day number (at least 1).
+        """
+        self.lookups += 1
+        offset = max((date_obj - self.start_date).days, 1)
+        while True:
+            while offset >= len(self._day_at):
+                self._extend(self.EXTEND_DAYS)
+            if self._day_at[offset]:
+                return self._day_at[offset]
+            offset += 1
+
+    def get_week(self, n: int) -> int:
+        """
+        Return the working week number (1-based) of working day ``n``.
+        """
+        return ((n - 1) // self.workdays_per_week) + 1
+
+
+def save_columns(path, columns, index=None, **extra):
     """
-    Get the working week number given a date and number of workdays per week.
+    Save a dict of equal-length columns as a NumPy ``.npz`` archive.
+
+    String (object) columns are dictionary-encoded as unique values plus
+    integer codes. ``extra`` arrays are stored as-is under their own names.
 
     Args:
-        date_obj (date): The date to calculate week for.
-        workdays_per_week (int): Number of workdays per week.
+        path (str | Path): Destination file.
+        columns (dict): Column name -> 1-D array.
+        index (array, optional): Row labels to restore on load.
+    """
+    names = list(columns)
+    arrays = {"__columns__": np.array(names, dtype=str), **extra}
+    if index is not None:
+        arrays["__index__"] = np.asarray(index)
+    for i, name in enumerate(names):
+        values = np.asarray(columns[name])
+        if values.dtype == object:
+            arrays[f"c{i}"], codes = np.unique(values.astype(str), return_inverse=True)
+            arrays[f"k{i}"] = codes.astype(np.int32)
+        else:
+            arrays[f"c{i}"] = values
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def load_columns(path):
+    """
+    Load an archive written by :func:`save_columns`.
 
     Returns:
-        int: Week number (1-based).
+        tuple: (dict of column arrays, index array or None, dict of extra arrays)
+    """
+    with np.load(path, allow_pickle=False) as data:
+        names = [str(name) for name in data["__columns__"]]
+        columns = {
+            name: data[f"c{i}"][data[f"k{i}"]].astype(object) if f"k{i}" in data else data[f"c{i}"]
+            for i, name in enumerate(names)
+        }
+        index = data["__index__"] if "__index__" in data else None
+        extra = {key: data[key] for key in data.files
+                 if not key.startswith("__") and not (key[0] in "ck" and key[1:].isdigit())}
+    return columns, index, extra
+
+
+def format_table(rows):
+    """
+    Plain-text table of ``rows`` (dicts sharing their keys), one line per
+    row under a header, columns right-aligned. Floats get two decimals.
     """
-    # Assuming week counting starts from some base date (e.g. start_date),
-    # for general purpose, can be overridden.
-    # This is a placeholder function; actual implementation depends on scheduler logic.
-    raise NotImplementedError("Please use DayTracker.get_week for week calculations.")
+    if not rows:
+        return ""
+    names = list(rows[0])
+    cells = [[f"{row[name]:.2f}" if isinstance(row[name], float) else str(row[name]) for name in names]
+             for row in rows]
+    widths = [max(len(name), *(len(line[i]) for line in cells)) for i, name in enumerate(names)]
+    lines = [names] + cells
+    return "\n".join("  ".join(value.rjust(width) for value, width in zip(line, widths)) for line in lines)